@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Times Textmap.cycles on maps of separate square rooms, the kind of map its algorithm handles.
+
+    $ python -m benchmarks.adjacency
+"""
+
+import time
+
+from pyudmf.model.textmap import Linedef, Sector, Sidedef, Textmap, Vertex
+
+
+def rooms_textmap(count: int) -> Textmap:
+    """ :return: A Textmap of @count separate 64x64 rooms in a row, each its own sector. """
+    sector = Sector(0, 128, "MFLR8_1", "MFLR8_1")
+    sidedef = Sidedef(sector, "STONE2")
+    vertices = []
+    linedefs = []
+    for i in range(count):
+        corners = [Vertex(128.0 * i + x, y) for x, y in ((0.0, 0.0), (0.0, 64.0), (64.0, 64.0), (64.0, 0.0))]
+        vertices.extend(corners)
+        linedefs.extend(Linedef(corners[j - 1], corners[j], sidefront=sidedef) for j in range(4))
+    return Textmap(vertices=vertices, linedefs=linedefs, sidedefs=[sidedef], sectors=[sector])
+
+
+def main():
+    for count in (100, 200, 2000, 10000):
+        textmap = rooms_textmap(count)
+        start = time.perf_counter()
+        cycles = textmap.cycles()
+        print("{:5} linedefs {:5} cycles {:8.3f} s".format(len(textmap.linedefs), len(cycles),
+                                                           time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compares ast2textmap against the three-pass version it replaced on synthetic maps, best of REPEAT runs
+without garbage collection.
+
+    $ python -m benchmarks.ast2textmap
+"""
+
+import gc
+import time
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.grammar.tu import Assignment
+from pyudmf.model.factory import ast2textmap, block2sector, block2thing, block2vertex, block2sidedef, block2linedef
+from pyudmf.model.textmap import Textmap
+from pyudmf.parser import parse_udmf
+
+REPEAT = 3
+
+
+def _three_pass(tu):
+    vertices = []
+    sectors = []
+    things = []
+    for global_expr in tu:
+        if isinstance(global_expr, Assignment) and global_expr.identifier == "namespace":
+            assert global_expr.value == "zdoom"
+        elif global_expr.identifier == "sector":
+            sectors.append(block2sector(global_expr))
+        elif global_expr.identifier == "thing":
+            things.append(block2thing(global_expr))
+        elif global_expr.identifier == "vertex":
+            vertices.append(block2vertex(global_expr))
+    sidedefs = []
+    for global_expr in tu:
+        if isinstance(global_expr, Assignment) and global_expr.identifier == "namespace":
+            pass
+        elif global_expr.identifier == "sidedef":
+            sidedefs.append(block2sidedef(global_expr, sectors))
+    linedefs = []
+    for global_expr in tu:
+        if isinstance(global_expr, Assignment) and global_expr.identifier == "namespace":
+            pass
+        elif global_expr.identifier == "linedef":
+            linedefs.append(block2linedef(global_expr, vertices, sidedefs))
+    return Textmap(
+        vertices=set(vertices),
+        linedefs=set(linedefs),
+        sidedefs=set(sidedefs),
+        sectors=set(sectors),
+        things=tuple(things),
+    )
+
+
+def main():
+    for columns, rows in ((20, 20), (40, 40), (89, 89)):
+        text = synthetic_textmap(columns, rows)
+        tu = parse_udmf(text, backend="scanner", packed=True)
+        print("{} lines".format(text.count("\n")))
+        for name, function in (("three-pass", _three_pass), ("one-pass", ast2textmap)):
+            timings = []
+            for _ in range(REPEAT):
+                gc.collect()
+                gc.disable()
+                start = time.perf_counter()
+                function(tu)
+                timings.append(time.perf_counter() - start)
+                gc.enable()
+            print("  {:10} {:8.3f} s".format(name, min(timings)))
+
+
+if __name__ == '__main__':
+    main()
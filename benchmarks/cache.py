@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Compares a cache miss, which parses the lump, against a cache hit on a synthetic map.
+
+    $ python -m benchmarks.cache
+"""
+
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.cache import TextmapCache
+
+
+def main():
+    data = synthetic_textmap(40, 40).encode()
+    print("{} bytes".format(len(data)))
+    with tempfile.TemporaryDirectory() as directory:
+        textmap_cache = TextmapCache(directory)
+        for name in ("miss", "hit"):
+            start = time.perf_counter()
+            textmap_cache.load(data)
+            print("{:5} {:8.3f} s".format(name, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Compares building a Textmap of a synthetic map against building a ColumnarTextmap, in time and in memory retained by
+the result.
+
+    $ python -m benchmarks.columnar
+"""
+
+import gc
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.model.columnar import ColumnarTextmap
+from pyudmf.model.factory import ast2textmap
+from pyudmf.parser import parse_udmf
+
+
+def _objects(text):
+    return ast2textmap(parse_udmf(text, backend="scanner", packed=True))
+
+
+def main():
+    text = synthetic_textmap(89, 89)
+    print("{} lines, {} bytes".format(text.count("\n"), len(text)))
+    for name, function in (("objects", _objects), ("columnar", ColumnarTextmap.parse)):
+        start = time.perf_counter()
+        function(text)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        tracemalloc.start()  # Tracing slows allocation down, so time and memory are measured on separate runs
+        result = function(text)
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        print("{:9} {:8.3f} s {:8.1f} MiB retained".format(name, elapsed, retained / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
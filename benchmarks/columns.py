@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Parses and scales a synthetic map through the object model and through the columnar parse mode.
+
+    $ python -m benchmarks.columns
+"""
+
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.columns import parse_udmf_columns
+from pyudmf.model.factory import ast2textmap
+from pyudmf.ops.scaler import scaled
+from pyudmf.parser import parse_udmf
+
+
+def _objects(text):
+    return scaled(ast2textmap(parse_udmf(text, backend="scanner")), 0.5)
+
+
+def _columns(text):
+    columns = parse_udmf_columns(text)
+    for block in ('vertex', 'thing'):
+        columns[block]['x'] *= 0.5
+        columns[block]['y'] *= 0.5
+    return columns
+
+
+def main():
+    text = synthetic_textmap(40, 40)
+    print("{} lines, {} bytes".format(text.count("\n"), len(text)))
+    for name, function in (("objects", _objects), ("columns", _columns)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        function(text)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{:8} {:8.3f} s {:8.1f} MiB peak".format(name, elapsed, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Times SebelinoVisage.textmap2ast on grid maps of growing sector count, with the faces of each map already found, so
+that only the export itself is measured, and IndexPreservingVisage.textmap2ast on the same maps.
+
+    $ python -m benchmarks.export
+"""
+
+import gc
+import time
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.model.factory import ast2textmap
+from pyudmf.model.visage import IndexPreservingVisage, SebelinoVisage
+from pyudmf.parser import parse_udmf
+
+
+def _best(visage, textmap) -> float:
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        visage.textmap2ast(textmap)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    gc.disable()
+    for size in (4, 8, 16, 32, 64):
+        textmap = ast2textmap(parse_udmf(synthetic_textmap(size, size), backend="scanner"))
+        textmap.cycles()
+        for visage in (SebelinoVisage(), IndexPreservingVisage()):
+            best = _best(visage, textmap)
+            print("{:22} {:5} sectors {:6} linedefs {:8.3f} s {:6.2f} us/linedef".format(
+                type(visage).__name__, len(textmap.cycles()), len(textmap.linedefs), best,
+                1e6 * best / len(textmap.linedefs)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Times Textmap.cycles on grid maps of 10 to 100k linedefs, to show how face extraction scales with map size.
+
+    $ python -m benchmarks.faces
+"""
+
+import gc
+import time
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.model.factory import ast2textmap
+from pyudmf.parser import parse_udmf
+
+
+def main():
+    gc.disable()
+    for size in (2, 7, 22, 70, 223):
+        textmap = ast2textmap(parse_udmf(synthetic_textmap(size, size), backend="scanner"))
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            cycles = textmap.cycles()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print("{:6} linedefs {:6} cycles {:8.3f} s {:6.2f} us/linedef".format(
+            len(textmap.linedefs), len(cycles), best, 1e6 * best / len(textmap.linedefs)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Times rendering coordinates to 3 decimal places through Decimal, as the visages used to, against fixed and
+fixed_all, then writing out a whole map with IndexPreservingVisage.
+
+    $ python -m benchmarks.formatting
+"""
+
+import gc
+import random
+import time
+from decimal import Decimal
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.grammar.fixed import fixed, fixed_all
+from pyudmf.model.factory import ast2textmap
+from pyudmf.model.visage import IndexPreservingVisage
+from pyudmf.parser import parse_udmf
+
+
+class _Discard(object):
+    def write(self, data):
+        pass
+
+
+def _best(function) -> float:
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    gc.disable()
+    random.seed(0)
+    # Mostly whole map units, as in most maps, with some scaled ones
+    values = [float(random.randint(-8192, 8192)) for _ in range(90000)]
+    values += [random.uniform(-8192, 8192) for _ in range(10000)]
+    random.shuffle(values)
+
+    for name, function in (
+            ("Decimal", lambda: [str(Decimal("{0:.3f}".format(v))) for v in values]),
+            ("fixed", lambda: [fixed(v, 3) for v in values]),
+            ("fixed_all", lambda: fixed_all(values, 3)),
+    ):
+        print("{:10} {} coordinates {:8.3f} s".format(name, len(values), _best(function)))
+
+    textmap = ast2textmap(parse_udmf(synthetic_textmap(100, 100), backend="scanner"))
+    visage = IndexPreservingVisage()
+    print("{:10} {} vertices {:8.3f} s".format("write", len(textmap.vertices),
+                                               _best(lambda: visage.write(textmap, _Discard()))))
+
+
+if __name__ == '__main__':
+    main()
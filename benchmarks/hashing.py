@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Times deduplicating the global expressions of a synthetic map with a set, hashing them by their text as nodes used
+to, and by their structural hashes, first computed and then cached.
+
+    $ python -m benchmarks.hashing
+"""
+
+import time
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.parser import parse_udmf
+
+
+def main():
+    tu = parse_udmf(synthetic_textmap(40, 40), backend="scanner")
+    print("{} global expressions".format(len(tu)))
+    for name, function in (
+            ("text", lambda: {hash(str(e)) for e in tu}),
+            ("computed", lambda: set(tu)),
+            ("cached", lambda: set(tu)),
+    ):
+        start = time.perf_counter()
+        function()
+        print("{:9} {:8.3f} s".format(name, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
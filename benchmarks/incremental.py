@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Compares re-parsing a synthetic map after a one-value edit with TranslationUnit.update and with a full parse.
+
+    $ python -m benchmarks.incremental
+"""
+
+import timeit
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.parser import parse_udmf
+
+
+def main():
+    text = synthetic_textmap(40, 40)
+    tu = parse_udmf(text, backend="scanner")
+    start = text.index("x = 640.000;")
+    edited = text[:start] + "x = 641.000;" + text[start + 12:]
+    edits = [(start, start + 12, 12)]
+    print("{} lines, {} bytes".format(text.count("\n"), len(text)))
+    full = min(timeit.repeat(lambda: parse_udmf(edited, backend="scanner"), number=1, repeat=3))
+    incremental = min(timeit.repeat(lambda: tu.update(edited, edits), number=1, repeat=3))
+    print("full        {:8.4f} s".format(full))
+    print("incremental {:8.4f} s".format(incremental))
+
+
+if __name__ == '__main__':
+    main()
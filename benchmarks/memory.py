@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Measures the memory held by the TranslationUnit of a synthetic map with tracemalloc.
+
+    $ python -m benchmarks.memory
+"""
+
+import gc
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.parser import parse_udmf
+
+
+def _retained(function):
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def main():
+    text = synthetic_textmap(40, 40)
+    print("{} lines, {} bytes".format(text.count("\n"), len(text)))
+    for name, options in (("nodes", {}), ("packed", {"packed": True})):
+        retained = _retained(lambda: parse_udmf(text, backend="scanner", **options))
+        print("{:7} {:8.1f} MiB".format(name, retained / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
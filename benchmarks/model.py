@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Times building sets of model objects: 1M vertices, and 500k linedefs between 500k vertices with a sidedef each.
+
+    $ python -m benchmarks.model
+"""
+
+import gc
+import time
+
+from pyudmf.model.textmap import Linedef, Sector, Sidedef, Vertex
+
+VERTICES = 1000000
+LINEDEFS = 500000
+
+
+def _timed(name, function):
+    gc.collect()
+    start = time.perf_counter()
+    result = function()
+    print("{:24} {:8.3f} s".format(name, time.perf_counter() - start))
+    return result
+
+
+def main():
+    coordinates = [(float(i % 1000), float(i // 1000)) for i in range(VERTICES)]
+    vertices = _timed("construct vertices", lambda: [Vertex(x, y) for x, y in coordinates])
+    _timed("vertex set", lambda: set(vertices))
+
+    sector = Sector(0, 128, "FLOOR4_8", "CEIL3_5")
+    sidedefs = [Sidedef(sector, "STARTAN{}".format(i % 10)) for i in range(LINEDEFS)]
+    linedefs = _timed("construct linedefs", lambda: [
+        Linedef(vertices[i], vertices[i + 1], sidefront=sidedefs[i]) for i in range(LINEDEFS)
+    ])
+    _timed("linedef set", lambda: set(linedefs))
+
+
+if __name__ == '__main__':
+    main()
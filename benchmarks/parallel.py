@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Measures parse_udmf_parallel against the number of worker processes on a synthetic 500k-line map.
+
+    $ python -m benchmarks.parallel
+"""
+
+import os
+import timeit
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.parser import parse_udmf_parallel
+
+
+def main():
+    text = synthetic_textmap(89, 89)
+    print("{} lines, {} bytes".format(text.count("\n"), len(text)))
+    workers = 1
+    baseline = None
+    while workers <= (os.cpu_count() or 1):
+        timing = min(timeit.repeat(lambda: parse_udmf_parallel(text, workers=workers), number=1, repeat=3))
+        baseline = baseline or timing
+        print("{:3} workers {:8.3f} s {:6.2f}x".format(workers, timing, baseline / timing))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Compares the parse_udmf backends on a synthetic map.
+
+    $ python -m benchmarks.parser
+"""
+
+import timeit
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.parser import parse_udmf, BACKENDS
+
+
+def main():
+    text = synthetic_textmap(40, 40)
+    print("{} lines, {} bytes".format(text.count("\n"), len(text)))
+    timings = {}
+    for backend in BACKENDS:
+        timings[backend] = min(timeit.repeat(lambda: parse_udmf(text, backend=backend), number=1, repeat=3))
+        print("{:10} {:8.3f} s".format(backend, timings[backend]))
+    print("speedup    {:8.1f}x".format(timings["pyparsing"] / timings["scanner"]))
+    lazy = min(timeit.repeat(lambda: parse_udmf(text, backend="scanner", lazy=True), number=1, repeat=3))
+    print("{:10} {:8.3f} s".format("lazy", lazy))
+
+
+if __name__ == '__main__':
+    main()
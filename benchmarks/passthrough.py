@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Times scaling a synthetic map and writing it out, formatting every block anew against copying the blocks the scaling
+leaves unchanged from the source.
+
+    $ python -m benchmarks.passthrough
+"""
+
+import os
+import time
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.ops.scaler import scaled_tu
+from pyudmf.parser import parse_udmf_buffer
+
+
+def main():
+    data = synthetic_textmap(40, 40).encode()
+    print("{} bytes".format(len(data)))
+    with open(os.devnull, 'wb') as devnull:
+        for factor in (1.0, 0.5):
+            for name, preserve_source in (("reformat", False), ("preserve", True)):
+                start = time.perf_counter()
+                tu = scaled_tu(parse_udmf_buffer(data, preserve_source), factor)
+                scaling = time.perf_counter() - start
+                start = time.perf_counter()
+                tu.write(devnull)
+                writing = time.perf_counter() - start
+                print("{:3} {:9} {:8.3f} s parsing and scaling {:8.3f} s writing".format(factor, name, scaling, writing))
+
+
+if __name__ == '__main__':
+    main()
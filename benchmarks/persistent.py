@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Compares editing one vertex of a synthetic map on a full copy of its TranslationUnit, as deepcopy used to make,
+against editing it with TranslationUnit.with_expr, which shares every other node.
+
+    $ python -m benchmarks.persistent
+"""
+
+import time
+import tracemalloc
+from decimal import Decimal
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.grammar.tu import Assignment, Block, TranslationUnit
+from pyudmf.parser import parse_udmf
+
+
+def _copied(tu: TranslationUnit) -> TranslationUnit:
+    return TranslationUnit(*[
+        Block(e.identifier, [Assignment(a.identifier, a.value) for a in e.expressions]) if isinstance(e, Block)
+        else Assignment(e.identifier, e.value)
+        for e in tu
+    ])
+
+
+def _edited(tu: TranslationUnit, i: int) -> TranslationUnit:
+    return tu.with_expr(i, tu[i].with_value('x', Decimal('1.000')))
+
+
+def main():
+    tu = parse_udmf(synthetic_textmap(40, 40), backend="scanner")
+    i = next(i for i, e in enumerate(tu) if isinstance(e, Block) and e.identifier == 'vertex')
+    print("{} global expressions".format(len(tu)))
+    for name, function in (("copy", lambda: _edited(_copied(tu), i)), ("shared", lambda: _edited(tu, i))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        print("{:7} {:8.4f} s {:10.1f} KiB".format(name, elapsed, allocated / 2 ** 10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Compares the peak memory of formatting the TranslationUnit of a synthetic map as a whole against streaming it to a
+file with TranslationUnit.write.
+
+    $ python -m benchmarks.serializer
+"""
+
+import os
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_textmap
+from pyudmf.parser import parse_udmf
+
+
+def _str(tu, fileobj):
+    fileobj.write(str(tu).encode())
+
+
+def _write(tu, fileobj):
+    tu.write(fileobj)
+
+
+def main():
+    tu = parse_udmf(synthetic_textmap(40, 40), backend="scanner")
+    with open(os.devnull, 'wb') as devnull:
+        for name, function in (("str", _str), ("write", _write)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            function(tu, devnull)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print("{:6} {:8.3f} s {:8.1f} MiB peak".format(name, elapsed, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+
+def synthetic_textmap(columns: int, rows: int) -> str:
+    """
+    :return: TEXTMAP text of a @columns x @rows grid of square 64x64 sectors, with one thing in every sector.
+    """
+    vertex_id = {}
+    blocks = ['namespace = "zdoom";']
+    for row in range(rows + 1):
+        for column in range(columns + 1):
+            vertex_id[column, row] = len(vertex_id)
+            blocks.append("vertex\n{{\nx = {:.3f};\ny = {:.3f};\n}}".format(64.0 * column, 64.0 * row))
+    sidedefs = []
+    for row in range(rows + 1):
+        for column in range(columns + 1):
+            for dx, dy in ((1, 0), (0, 1)):
+                if column + dx > columns or row + dy > rows:
+                    continue
+                front = row * columns + column if row < rows and column < columns else None
+                back = (row - dx) * columns + (column - dy) if row - dx >= 0 and column - dy >= 0 else None
+                if front is None:
+                    front, back = back, None
+                lines = ["v1 = {};".format(vertex_id[column, row]),
+                         "v2 = {};".format(vertex_id[column + dx, row + dy]),
+                         "sidefront = {};".format(len(sidedefs))]
+                sidedefs.append(front)
+                if back is not None:
+                    lines.append("sideback = {};".format(len(sidedefs)))
+                    lines.append("twosided = true;")
+                    sidedefs.append(back)
+                else:
+                    lines.append("blocking = true;")
+                blocks.append("linedef\n{{\n{}\n}}".format("\n".join(lines)))
+    for sector in sidedefs:
+        blocks.append('sidedef\n{{\nsector = {};\ntexturemiddle = "STONE2";\n}}'.format(sector))
+    for row in range(rows):
+        for column in range(columns):
+            blocks.append('sector\n{\nheightceiling = 128;\ntexturefloor = "MFLR8_1";\n'
+                          'textureceiling = "MFLR8_1";\nlightlevel = 160;\n}')
+            blocks.append("thing\n{{\nx = {:.3f};\ny = {:.3f};\ntype = 1;\n}}".format(
+                64.0 * column + 32.0, 64.0 * row + 32.0))
+    return "\n\n".join(blocks) + "\n"
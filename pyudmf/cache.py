@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+"""
+A content-addressed on-disk cache of parsed TEXTMAP lumps.
+
+Each entry stores a Textmap as a handful of flat arrays in which vertices, sectors and sidedefs are referred to by
+their index into the corresponding table, so loading an entry is a few bulk reads rather than unpickling an object
+graph.
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+from typing import BinaryIO, Optional
+
+import pyudmf
+from pyudmf.model.factory import ast2textmap
+from pyudmf.model.textmap import Order, Textmap, Vertex, Sector, Sidedef, Linedef, Thing, indexed
+from pyudmf.scanner import parse_udmf_buffer
+
+MAGIC = b'PYUDMFC2'
+MAX_BYTES = 256 * 2 ** 20
+
+_ARRAY = struct.Struct('<cQ')  # typecode, number of items
+_ENCODING = 'utf-8'
+
+# What reading a truncated or corrupt entry may raise
+_CORRUPT = (EOFError, ValueError, IndexError, struct.error)
+
+
+def _number(x: float):
+    return int(x) if x.is_integer() else x
+
+
+def _write_array(f: BinaryIO, a: array):
+    f.write(_ARRAY.pack(a.typecode.encode('ascii'), len(a)))
+    a.tofile(f)
+
+
+def _read_array(f: BinaryIO) -> array:
+    typecode, length = _ARRAY.unpack(f.read(_ARRAY.size))
+    a = array(typecode.decode('ascii'))
+    a.fromfile(f, length)
+    return a
+
+
+def dump_textmap(textmap: Textmap, f: BinaryIO):
+    """ Writes @textmap to @f, along with its index order if it has one. """
+    order = textmap.order
+    if order is None:
+        order = Order(textmap.vertices, textmap.sidedefs, textmap.linedefs, textmap.sectors)
+    linedefs = list(order.linedefs)
+    vertices, v2id = indexed(order.vertices, (v for ld in linedefs for v in (ld.v1, ld.v2)))
+    sidedefs, sd2id = indexed(
+        order.sidedefs, (sd for ld in linedefs for sd in (ld.sidefront, ld.sideback) if sd is not None))
+    sectors, s2id = indexed(order.sectors, (sd.sector for sd in sidedefs))
+    strings = list(dict.fromkeys([textmap.namespace] + [sd.texturemiddle for sd in sidedefs] +
+                                 [t for s in sectors for t in (s.texturefloor, s.textureceiling)]))
+    str2id = {string: i for i, string in enumerate(strings)}
+
+    encoded = [s.encode(_ENCODING) for s in strings]
+    f.write(MAGIC)
+    _write_array(f, array('q', [len(order.vertices), len(order.sidedefs), len(order.sectors),
+                                str2id[textmap.namespace], textmap.order is not None]))
+    _write_array(f, array('q', [len(s) for s in encoded]))
+    _write_array(f, array('B', b''.join(encoded)))
+    _write_array(f, array('d', [c for v in vertices for c in (v.x, v.y)]))
+    _write_array(f, array('q', [i for s in sectors for i in (str2id[s.texturefloor], str2id[s.textureceiling])]))
+    _write_array(f, array('d', [x for s in sectors for x in (
+        s.heightfloor, s.heightceiling, s.xscalefloor, s.yscalefloor, s.xscaleceiling, s.yscaleceiling)]))
+    _write_array(f, array('q', [i for sd in sidedefs for i in (s2id[id(sd.sector)], str2id[sd.texturemiddle])]))
+    _write_array(f, array('d', [x for sd in sidedefs for x in (sd.offsetx, sd.offsety)]))
+    _write_array(f, array('q', [i for ld in linedefs for i in (
+        v2id[id(ld.v1)], v2id[id(ld.v2)],
+        -1 if ld.sidefront is None else sd2id[id(ld.sidefront)],
+        -1 if ld.sideback is None else sd2id[id(ld.sideback)],
+        ld.blocking,
+    )]))
+    _write_array(f, array('q', [t.type for t in textmap.things]))
+    _write_array(f, array('d', [c for t in textmap.things for c in (t.x, t.y)]))
+
+
+def load_textmap(f: BinaryIO) -> Textmap:
+    """
+    :return: The Textmap dump_textmap wrote to @f, with its index order if it had one.
+    :raise ValueError: If @f does not hold a textmap so written.
+    :raise EOFError: If it is cut short.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a cached textmap")
+    vertex_count, sidedef_count, sector_count, namespace, ordered = _read_array(f)
+    lengths = _read_array(f)
+    blob = _read_array(f).tobytes()
+    strings = []
+    offset = 0
+    for length in lengths:
+        strings.append(blob[offset:offset + length].decode(_ENCODING))
+        offset += length
+
+    xy = _read_array(f)
+    vertices = [Vertex(x, y) for x, y in zip(xy[0::2], xy[1::2])]
+    s_textures, s_numbers = _read_array(f), _read_array(f)
+    sectors = [
+        Sector(_number(s_numbers[3 * i]), _number(s_numbers[3 * i + 1]), strings[s_textures[i]],
+               strings[s_textures[i + 1]], *s_numbers[3 * i + 2:3 * i + 6])
+        for i in range(0, len(s_textures), 2)
+    ]
+    sd_ints, sd_offsets = _read_array(f), _read_array(f)
+    sidedefs = [
+        Sidedef(sectors[sector], strings[texture], _number(offsetx), _number(offsety))
+        for sector, texture, offsetx, offsety in zip(sd_ints[0::2], sd_ints[1::2], sd_offsets[0::2], sd_offsets[1::2])
+    ]
+    ld_ints = _read_array(f)
+    linedefs = [
+        Linedef(
+            vertices[ld_ints[i]],
+            vertices[ld_ints[i + 1]],
+            sidefront=None if ld_ints[i + 2] < 0 else sidedefs[ld_ints[i + 2]],
+            sideback=None if ld_ints[i + 3] < 0 else sidedefs[ld_ints[i + 3]],
+            blocking=bool(ld_ints[i + 4]),
+        )
+        for i in range(0, len(ld_ints), 5)
+    ]
+    types, xy = _read_array(f), _read_array(f)
+    things = [Thing(tpe, x, y) for tpe, x, y in zip(types, xy[0::2], xy[1::2])]
+
+    order = Order(tuple(vertices[:vertex_count]), tuple(sidedefs[:sidedef_count]), tuple(linedefs),
+                  tuple(sectors[:sector_count]))
+    return Textmap(
+        namespace=strings[namespace],
+        vertices=order.vertices,
+        sidedefs=order.sidedefs,
+        linedefs=order.linedefs,
+        sectors=order.sectors,
+        things=things,
+        order=order if ordered else None,
+    )
+
+
+class TextmapCache(object):
+    """
+    Maps the bytes of a TEXTMAP lump to the Textmap that ast2textmap(parse_udmf(...)) makes of it. Entries live in
+    @directory, one file per entry named after the hash of the lump and the library version. When the entries
+    exceed @max_bytes in total, the least recently used ones are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data) -> str:
+        h = hashlib.sha256(pyudmf.__version__.encode('ascii'))
+        h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, data) -> Optional[Textmap]:
+        """ :return: The cached Textmap of the TEXTMAP lump @data, or None on a cache miss. """
+        path = self._path(self.key(data))
+        try:
+            with open(path, 'rb') as f:
+                textmap = load_textmap(f)
+        except FileNotFoundError:
+            return None
+        except _CORRUPT:
+            os.remove(path)  # Truncated or corrupt, e.g. by a crash while it was replaced; written anew on put
+            return None
+        os.utime(path)  # Mark as recently used
+        return textmap
+
+    def put(self, data, textmap: Textmap):
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                dump_textmap(textmap, f)
+            os.replace(temp, self._path(self.key(data)))
+        except BaseException:
+            os.remove(temp)
+            raise
+        self._evict()
+
+    def load(self, data) -> Textmap:
+        """ :return: The Textmap of the TEXTMAP lump @data, parsing it only on a cache miss. """
+        textmap = self.get(data)
+        if textmap is None:
+            textmap = ast2textmap(parse_udmf_buffer(data))
+            self.put(data, textmap)
+        return textmap
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
@@ -1,24 +1,108 @@
 #!/usr/bin/env python
 import argparse
+import io
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, List, Optional
 
-from pyudmf.model.factory import ast2textmap, textmap2ast
-from pyudmf.ops.scaler import scaled
-from pyudmf.parser import parse_udmf
+from pyudmf.grammar.tu import TranslationUnit
+from pyudmf.model.factory import UnsupportedNamespace, ast2textmap
+from pyudmf.model.visage import IndexPreservingVisage
+from pyudmf.ops.scaler import scaled, scaled_tu
+from pyudmf.parser import parse_udmf_mmap, parse_udmf_buffer
+from pyudmf.wad import Lump, Wad, is_wad, write_wad
+
+
+def scaled_ast(ast: TranslationUnit, factor: float) -> TranslationUnit:
+    textmap = ast2textmap(ast)
+    scaled_textmap = scaled(textmap, factor)
+    return IndexPreservingVisage().textmap2ast(scaled_textmap)
+
+
+def write_scaled(ast: TranslationUnit, factor: float, fileobj: BinaryIO):
+    """ Writes what scaled_ast returns to @fileobj block by block, as each block is made. """
+    IndexPreservingVisage().write(scaled(ast2textmap(ast), factor), fileobj)
+
+
+def _encoded(ast: TranslationUnit) -> memoryview:
+    buffer = io.BytesIO()
+    ast.write(buffer)
+    return buffer.getbuffer()
+
+
+def transformed_textmaps(wad: Wad, transformed: Callable[[memoryview], TranslationUnit]) -> List[Lump]:
+    """
+    :return: The lumps of @wad with every TEXTMAP replaced by what @transformed returns for it. Maps in a namespace
+             @transformed does not support are kept as they are, with a message on standard error.
+    """
+    def transform(name, data):
+        try:
+            return _encoded(transformed(data))
+        except UnsupportedNamespace as e:
+            print("Skipping {}: {}".format(name, e), file=sys.stderr)
+            return None
+
+    return wad.with_textmaps(transform)
+
+
+@contextmanager
+def output(path: Optional[str]) -> Iterator[BinaryIO]:
+    """
+    :return: A context manager of a binary file to write to @path, or to standard output if @path is None. The file
+             at @path is only replaced once the context exits without error, so that input that fails to parse does
+             not leave an empty or partial file behind.
+    """
+    if path is None:
+        try:
+            yield sys.stdout.buffer
+        finally:
+            sys.stdout.buffer.flush()
+        return
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp, 0o666 & ~umask)  # As open would have created it, not private as mkstemp does
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Scale an UDMF formatted Doom map.")
-    parser.add_argument('infile', help="Path to the TEXTMAP lump file.")
+    parser.add_argument('infile', help="Path to the TEXTMAP lump file, or to a WAD file whose UDMF maps should all be"
+                                       " scaled.")
     parser.add_argument('scalingfactor', type=float, help="Scaling factor. E.g. if the factor is 0.5, the map will"
                                                           " shrink to 25 %% of its original area.")
+    parser.add_argument('-o', '--outfile', help="Path to write the result to, instead of standard output.")
+    parser.add_argument('-p', '--preserve', action='store_true',
+                        help="Scale the map as written instead of laying it out anew: blocks the scaling leaves"
+                             " unchanged are copied from the input, and properties pyudmf does not model are kept.")
 
     args = parser.parse_args()
 
-    with open(args.infile, 'r') as f:
-        textmap_string = f.read().strip()
-    ast = parse_udmf(textmap_string)
-    textmap = ast2textmap(ast)
-    scaled_textmap = scaled(textmap, args.scalingfactor)
-    scaled_ast = textmap2ast(scaled_textmap)
+    if args.preserve:
+        def transformed(data):
+            return scaled_tu(parse_udmf_buffer(data, preserve_source=True), args.scalingfactor)
+    else:
+        def transformed(data):
+            return scaled_ast(parse_udmf_buffer(data), args.scalingfactor)
 
-    print(scaled_ast)
+    try:
+        with output(args.outfile) as outfile:
+            if is_wad(args.infile):
+                wad = Wad(args.infile)
+                write_wad(outfile, transformed_textmaps(wad, transformed), wad.magic)
+            elif args.preserve:
+                scaled_tu(parse_udmf_mmap(args.infile, preserve_source=True), args.scalingfactor).write(outfile)
+            else:
+                ast = parse_udmf_mmap(args.infile)
+                write_scaled(ast, args.scalingfactor, outfile)
+                outfile.write(b"\n")
+    except UnsupportedNamespace as e:
+        sys.exit("{}: {}".format(args.infile, e))
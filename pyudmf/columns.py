@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""
+Parses a TEXTMAP lump straight into one NumPy structured array per block type, without building a TranslationUnit.
+Requires NumPy.
+"""
+
+import re
+import sys
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from pyudmf.grammar.schema import _number
+from pyudmf.grammar.tu import Assignment
+from pyudmf.scanner import _WS, _IDENTIFIER
+
+_TOKEN = r'(?:[+-]?[0-9]+(?:\.[0-9]*)?|"[^"\n\r]*"|[A-Za-z]+)'
+_PAIR = r'({id}){ws}={ws}({token}){ws};'.format(ws=_WS, id=_IDENTIFIER, token=_TOKEN)
+
+_BLOCK = re.compile(r'{ws}({id}){ws}\{{((?:[^"}}]|"[^"\n\r]*")*)\}}'.format(ws=_WS, id=_IDENTIFIER))
+_BODY = re.compile(r'(?:{ws}{id}{ws}={ws}{token}{ws};)*{ws}'.format(ws=_WS, id=_IDENTIFIER, token=_TOKEN))
+_PAIRS = re.compile(_PAIR)
+_GLOBAL_ASSIGNMENT = re.compile(_WS + _PAIR)
+_TRAILING = re.compile(_WS + r'\Z')
+
+VERTEX = np.dtype([('x', np.float64), ('y', np.float64)])
+LINEDEF = np.dtype([('v1', np.int32), ('v2', np.int32), ('sidefront', np.int32), ('sideback', np.int32),
+                    ('flags', np.int32)])
+SIDEDEF = np.dtype([('sector', np.int32), ('texturemiddle', object), ('offsetx', np.int32), ('offsety', np.int32)])
+SECTOR = np.dtype([('heightfloor', np.int32), ('heightceiling', np.int32), ('texturefloor', object),
+                   ('textureceiling', object), ('lightlevel', np.int32), ('xscalefloor', np.float64),
+                   ('yscalefloor', np.float64), ('xscaleceiling', np.float64), ('yscaleceiling', np.float64)])
+THING = np.dtype([('type', np.int32), ('x', np.float64), ('y', np.float64), ('angle', np.int32)])
+
+# Bits of the flags column, as in the binary Doom map format
+LINEDEF_FLAGS = {
+    'blocking': 0x0001,
+    'blockmonsters': 0x0002,
+    'twosided': 0x0004,
+    'dontpegtop': 0x0008,
+    'dontpegbottom': 0x0010,
+    'secret': 0x0020,
+    'blocksound': 0x0040,
+    'dontdraw': 0x0080,
+    'mapped': 0x0100,
+}
+
+
+def _int(token) -> int:
+    """ :return: The number @token truncated to an int, as the object model does, e.g. 0 for "0.0". """
+    try:
+        return int(token)
+    except ValueError:
+        return int(_number(token))
+
+
+def _texture(token: str) -> str:
+    return sys.intern(Assignment._unquote(token[1:-1]))
+
+
+def _vertex(props):
+    return props['x'], props['y']
+
+
+def _linedef(props):
+    flags = sum(bit for key, bit in LINEDEF_FLAGS.items() if props.get(key) == 'true')
+    return props['v1'], props['v2'], props['sidefront'], props.get('sideback', -1), flags
+
+
+def _sidedef(props):
+    texturemiddle = props.get('texturemiddle')
+    return (
+        props['sector'],
+        '-' if texturemiddle is None else _texture(texturemiddle),
+        props.get('offsetx', 0),
+        props.get('offsety', 0),
+    )
+
+
+def _sector(props):
+    return (
+        props.get('heightfloor', 0),
+        props.get('heightceiling', 0),
+        _texture(props['texturefloor']),
+        _texture(props['textureceiling']),
+        props.get('lightlevel', 160),
+        props.get('xscalefloor', 1.0),
+        props.get('yscalefloor', 1.0),
+        props.get('xscaleceiling', 1.0),
+        props.get('yscaleceiling', 1.0),
+    )
+
+
+def _thing(props):
+    return props['type'], props['x'], props['y'], props.get('angle', 0)
+
+
+# Block type -> (dtype, function from the block's raw properties to a row). Rows hold the source tokens of numbers,
+# which NumPy converts to the column types in bulk, and textures unquoted. Missing optional properties take their
+# UDMF default; a sideback of -1 means none.
+COLUMNS = {
+    'vertex': (VERTEX, _vertex),
+    'linedef': (LINEDEF, _linedef),
+    'sidedef': (SIDEDEF, _sidedef),
+    'sector': (SECTOR, _sector),
+    'thing': (THING, _thing),
+}
+
+
+_INVALID = "Invalid value in {} block at offset {}"
+
+
+def _array(block: str, rows: List[Tuple], offsets: List[int], dtype: np.dtype) -> np.ndarray:
+    """
+    :return: @rows, the rows of blocks at @offsets, as an array of @dtype. Integers written with a fraction, such as
+             "0.0", which NumPy does not convert, are truncated as the object model does.
+    :raise ValueError: Naming the first block with a value that is not a number.
+    """
+    try:
+        return np.array(rows, dtype=dtype)
+    except ValueError:
+        pass
+    integral = [dtype[name].kind == 'i' for name in dtype.names]
+    converted = []
+    for row, offset in zip(rows, offsets):
+        try:
+            row = tuple(_int(v) if i else v for v, i in zip(row, integral))
+            np.array([row], dtype=dtype)
+        except ValueError:
+            raise ValueError(_INVALID.format(block, offset)) from None
+        converted.append(row)
+    return np.array(converted, dtype=dtype)
+
+
+def parse_udmf_columns(textmap_string: str, columns: Dict[str, Tuple[np.dtype, Callable]] = COLUMNS
+                       ) -> Dict[str, np.ndarray]:
+    """
+    :param columns: The block types to collect, each mapped to a dtype and a function from the raw properties of such
+                    a block to a row, as COLUMNS does.
+    :return: A dictionary mapping each block type in @columns to a structured array with one row per block of that
+             type, in order of appearance. Other blocks and top-level assignments are validated but skipped.
+    :raise ValueError: If @textmap_string is not a well-formed TEXTMAP, or a value in @columns is not a number.
+    :raise KeyError: If a block lacks a property its columns require.
+    """
+    rows = {block: [] for block in columns}
+    offsets = {block: [] for block in columns}
+    block_match = _BLOCK.match
+    body_match = _BODY.fullmatch
+    findall = _PAIRS.findall
+    pos = 0
+    while True:
+        match = block_match(textmap_string, pos)
+        if match:
+            block, body = match.groups()
+            if not body_match(body):
+                raise ValueError("Malformed {} block at offset {}".format(block, pos))
+            if block in columns:
+                rows[block].append(columns[block][1](dict(findall(body))))
+                offsets[block].append(pos)
+            pos = match.end()
+            continue
+        match = _GLOBAL_ASSIGNMENT.match(textmap_string, pos)
+        if not match:
+            break
+        pos = match.end()
+    if not _TRAILING.match(textmap_string, pos):
+        raise ValueError("Unexpected input at offset {}".format(pos))
+    return {block: _array(block, rows[block], offsets[block], dtype) for block, (dtype, _) in columns.items()}
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+"""
+Renders floats as fixed-precision UDMF number tokens, without going through Decimal. For finite values the tokens are
+exactly str(Decimal("{:.Nf}".format(value))). Sequences of values are rendered in bulk, using NumPy when it is
+installed.
+"""
+
+from typing import List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Below this many values, the plain loop beats converting to and from an array
+_NUMPY_MINIMUM = 64
+
+
+def fixed(value: float, places: int) -> str:
+    """ :return: @value rounded to @places decimal places, as "{:.Nf}" formats it: "nan" and "inf" for non-finite. """
+    return "{0:.{1}f}".format(value, places)
+
+
+def fixed_all(values: Sequence[float], places: int) -> List[str]:
+    """ :return: The list of fixed(value, @places) for every value in @values. """
+    if np is None or len(values) < _NUMPY_MINIMUM:
+        fmt = "{{0:.{}f}}".format(places).format
+        return [fmt(v) for v in values]
+    return _fixed_numpy(np.asarray(values, dtype=np.float64), places)
+
+
+def _fixed_numpy(array, places: int) -> List[str]:
+    # Integral values, the bulk of coordinates in most maps, are printed as integers with a zero fraction in one
+    # vectorized step. Negative zero keeps its sign, so the formatting loop gets it along with all other values.
+    integral = (array == np.floor(array)) & (np.abs(array) < 2.0 ** 53) & ~((array == 0) & np.signbit(array))
+    tokens = np.empty(len(array), dtype=object)
+    suffix = "." + "0" * places if places else ""
+    tokens[integral] = np.char.add(array[integral].astype(np.int64).astype(str), suffix)
+    rest = np.flatnonzero(~integral)
+    fmt = "{{0:.{}f}}".format(places).format
+    tokens[rest] = [fmt(v) for v in array[rest].tolist()]
+    return tokens.tolist()
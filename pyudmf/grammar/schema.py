@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+Types of the standard UDMF properties. No property has different types in different namespaces or blocks, so values
+are cast by property name alone, through GLOBAL_CONVERTERS.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict
+
+
+# Converters keep a token that does not have the type of its property as it is, rather than reject the map.
+
+
+def _number(token: str):
+    """ Integers stay integers and anything with a fractional part becomes a Decimal, so values print as read. """
+    try:
+        if '.' in token:
+            return Decimal(token)
+        return int(token)
+    except (ValueError, InvalidOperation):
+        return token
+
+
+def _boolean(token: str):
+    if token == 'true':
+        return True
+    elif token == 'false':
+        return False
+    return token
+
+
+def _string(token: str) -> str:
+    return token
+
+
+def _converters(*groups) -> Dict[str, Callable]:
+    """
+    :param groups: (converter, *properties) tuples.
+    :raise TypeError: If a property is listed with different converters.
+    """
+    converters = dict()
+    for converter, *keys in groups:
+        for key in keys:
+            if converters.setdefault(key, converter) is not converter:
+                raise TypeError("{} has different types in different blocks or namespaces".format(key))
+    return converters
+
+
+_ARGS = ('arg0', 'arg1', 'arg2', 'arg3', 'arg4')
+
+# Casts a property by name, in any block and namespace. Integer and floating point properties share _number, which
+# keeps the type of the token rather than that of the property.
+GLOBAL_CONVERTERS = _converters(
+    # Base, in all namespaces
+    (_number, 'id', 'v1', 'v2', 'sidefront', 'sideback', 'special', 'offsetx', 'offsety', 'sector', 'x', 'y',
+     'heightfloor', 'heightceiling', 'lightlevel', 'angle', 'type', 'height'),
+    (_boolean, 'blocking', 'blockmonsters', 'twosided', 'dontpegtop', 'dontpegbottom', 'secret', 'blocksound',
+     'dontdraw', 'mapped', 'skill1', 'skill2', 'skill3', 'skill4', 'skill5', 'ambush', 'single', 'dm', 'coop'),
+    (_string, 'comment', 'texturetop', 'texturebottom', 'texturemiddle', 'texturefloor', 'textureceiling'),
+    # Doom
+    (_boolean, 'passuse', 'friend'),
+    # Hexen
+    (_number, *_ARGS),
+    (_boolean, 'playercross', 'playeruse', 'monstercross', 'monsteruse', 'impact', 'playerpush', 'monsterpush',
+     'missilecross', 'repeatspecial', 'dormant', 'class1', 'class2', 'class3'),
+    # Strife
+    (_boolean, 'translucent', 'jumpover', 'blockfloaters', 'standing', 'strifeally', 'invisible'),
+    # ZDoom
+    (_number, 'locknumber', 'alpha', 'light', 'scalex_top', 'scaley_top', 'scalex_mid', 'scaley_mid',
+     'scalex_bottom', 'scaley_bottom', 'offsetx_top', 'offsety_top', 'offsetx_mid', 'offsety_mid', 'offsetx_bottom',
+     'offsety_bottom', 'lightfloor', 'lightceiling', 'lightcolor', 'fadecolor', 'damageamount', 'damageinterval',
+     'leakiness', 'xpanningfloor', 'ypanningfloor', 'xpanningceiling', 'ypanningceiling', 'xscalefloor',
+     'yscalefloor', 'xscaleceiling', 'yscaleceiling', 'rotationfloor', 'rotationceiling', 'ceilingplane_a',
+     'ceilingplane_b', 'ceilingplane_c', 'ceilingplane_d', 'floorplane_a', 'floorplane_b', 'floorplane_c',
+     'floorplane_d', 'alphafloor', 'alphaceiling', 'gravity', 'desaturation', 'conversation', 'score', 'fillcolor',
+     'pitch', 'roll', 'floatbobphase', 'health', 'scalex', 'scaley', 'scale'),
+    (_boolean, 'playeruseback', 'anycross', 'monsteractivate', 'blockplayers', 'blockeverything', 'firstsideonly',
+     'zoneboundary', 'clipmidtex', 'wrapmidtex', 'midtex3d', 'checkswitchrange', 'blockprojectiles', 'blockuse',
+     'blocksight', 'blockhitscan', 'transparent', 'lightabsolute', 'lightfog', 'nofakecontrast', 'smoothlighting',
+     'nodecals', 'lightfloorabsolute', 'lightceilingabsolute', 'silent', 'nofallingdamage', 'dropactors',
+     'norespawn', 'hidden', 'waterzone', 'damageterraineffect', 'damagehazard', 'countsecret'),
+    (_string, 'renderstyle', 'arg0str', 'moreids', 'renderstylefloor', 'renderstyleceiling', 'damagetype',
+     'floorterrain', 'ceilingterrain', 'soundsequence'),
+)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+from decimal import Decimal
+
+import pytest
+
+from pyudmf.grammar import fixed as fixed_module
+from pyudmf.grammar.fixed import fixed, fixed_all
+from pyudmf.grammar.tu import Assignment
+
+VALUES = [0.0, -0.0, 1.0, -1.0, 64.0, -4096.0, 0.0005, 0.0015, 2.5, -2.5, 1 / 3, 123456.7895, 1e20, -1e-9, 2.0 ** 53,
+          2.0 ** 60]
+
+
+@pytest.mark.parametrize("places", [0, 3, 6])
+def test_fixed(places):
+    for value in VALUES:
+        assert fixed(value, places) == str(Decimal("{0:.{1}f}".format(value, places)))
+
+
+@pytest.mark.parametrize("places", [0, 3, 6])
+@pytest.mark.parametrize("numpy", [False, True])
+def test_fixed_all(places, numpy, monkeypatch):
+    if numpy:
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(fixed_module, '_NUMPY_MINIMUM', 0)
+    else:
+        monkeypatch.setattr(fixed_module, 'np', None)
+    values = VALUES + [float('nan'), float('inf'), -float('inf')]
+    assert fixed_all(values, places) == [fixed(v, places) for v in values]
+    assert fixed_all([], places) == []
+
+
+def test_deferred_value():
+    assignment = Assignment.deferred("x", fixed(32.0, 3))
+    assert assignment == Assignment("x", Decimal("32.000"))
+    assert str(assignment) == "x = 32.000;"
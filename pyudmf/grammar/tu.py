@@ -1,15 +1,42 @@
 #!/usr/bin/env python3
 
 import json
+import sys
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
 from decimal import Decimal
-from typing import List
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Sequence, Tuple
 
 from pyparsing import Group
 
+from pyudmf.grammar.schema import GLOBAL_CONVERTERS
+from pyudmf.immutable import immutable, setstate, setters
+
+ENCODING = 'utf-8'
+
+
+class _Deferred(object):
+    """ The type of _DEFERRED, which pickles as a reference to it, so that it is the same object after unpickling. """
+    __slots__ = ()
+
+    def __reduce__(self):
+        return '_DEFERRED'
+
+
+# The value of an Assignment whose token has not been cast yet
+_DEFERRED = _Deferred()
+
+_WHITESPACE_ESCAPES = (('\\t', '\t'), ('\\n', '\n'), ('\\f', '\f'), ('\\r', '\r'))
+
+
+def _assignment_hash(identifier: str, value) -> int:
+    # Equal values of different types, such as 1 and True, make unequal Assignments
+    return hash((identifier, value.__class__, value))
+
 
 class Node(metaclass=ABCMeta):
+    """ Nodes are immutable. Edits make new nodes that share every unchanged child with the old ones. """
+    __slots__ = ()
+
     def __eq__(self, other):
         return self.__class__ == other.__class__ and all(a.__class__ == b.__class__ and a == b for a, b in zip(self, other))
 
@@ -31,8 +58,21 @@ class Node(metaclass=ABCMeta):
 
 
 class TranslationUnit(Node):
-    def __init__(self, *lst):
-        self.global_expr_list = lst
+    __slots__ = ('global_expr_list', 'spans', 'source', '_parsed')
+
+    def __init__(self, *lst, spans: Optional[Tuple[Tuple[int, int], ...]] = None, source=None):
+        """
+        :param spans: The (start, end) offsets of each global expression in the source it was parsed from, including
+                      any whitespace that precedes it, or None if unknown.
+        :param source: The str or bytes-like object @spans refer to, to keep the TranslationUnit source-preserving:
+                       global expressions that are still the ones parsed from @source are serialized by copying
+                       their text from it, whitespace included, rather than formatting them.
+        """
+        assert source is None or spans is not None
+        _t_global_expr_list(self, lst)
+        _t_spans(self, spans)
+        _t_source(self, source)
+        _t_parsed(self, lst if source is not None else None)
 
     def __getitem__(self, i):
         return self.global_expr_list[i]
@@ -48,41 +88,179 @@ class TranslationUnit(Node):
     def __len__(self):
         return len(self.global_expr_list)
 
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if self.__class__ != other.__class__ or len(self) != len(other):
+            return False
+        return all(a is b or (a.__class__ == b.__class__ and a == b)
+                   for a, b in zip(self.global_expr_list, other.global_expr_list))
+
+    def with_expr(self, i: int, node: Node) -> "TranslationUnit":
+        """ :return: A TranslationUnit with global expression @i replaced by @node, sharing all the others. """
+        return self.with_exprs({i: node})
+
+    def with_exprs(self, nodes: Dict[int, Node]) -> "TranslationUnit":
+        """
+        :param nodes: The replacement for each global expression to replace, keyed by index.
+        :return: A TranslationUnit with the global expressions replaced, sharing all the others. A source-preserving
+                 TranslationUnit stays so, and keeps copying the global expressions not replaced since parsing
+                 from its source. Otherwise, the result no longer matches any source, so its spans are None.
+        """
+        lst = list(self.global_expr_list)
+        for i, node in nodes.items():
+            assert isinstance(node, Node)
+            lst[i] = node
+        if self.source is None:
+            return TranslationUnit(*lst)
+        tu = TranslationUnit(*lst, spans=self.spans, source=self.source)
+        _t_parsed(tu, self._parsed)
+        return tu
+
+    def modified(self) -> bool:
+        """ :return: Whether any global expression of a source-preserving TranslationUnit has been replaced. """
+        return self._parsed is not None and any(a is not b for a, b in zip(self.global_expr_list, self._parsed))
+
+    def replace_block(self, old: "Block", new: "Block") -> "TranslationUnit":
+        """ :return: A TranslationUnit with the global expression that is @old replaced by @new. """
+        for i, e in enumerate(self.global_expr_list):
+            if e is old:
+                return self.with_expr(i, new)
+        raise ValueError("Block is not a global expression of this TranslationUnit")
+
+    def update(self, text: str, edits: Iterable[Tuple[int, int, int]], lazy: bool = False) -> "TranslationUnit":
+        """
+        Re-parses only the global expressions that @edits touch.
+
+        :param text: The edited source.
+        :param edits: Non-overlapping (start, end, length) triples, each saying that the characters between offsets
+                      start and end of the source this TranslationUnit was parsed from were replaced by length
+                      characters.
+        :param lazy: See pyudmf.scanner.scan_udmf.
+        :return: A TranslationUnit of @text that shares every untouched node with this one.
+        """
+        from pyudmf.scanner import update_udmf
+        return update_udmf(self, text, edits, lazy)
+
+    def _pieces(self) -> Iterator:
+        """
+        :return: An iterator over consecutive pieces of the serialized TranslationUnit, at most one global expression
+                 each: strs, or memoryviews of a bytes-like source.
+        """
+        source = self.source
+        if source is not None and not isinstance(source, str):
+            source = memoryview(source)
+        separator = ""
+        for i, e in enumerate(self.global_expr_list):
+            if source is not None and e is self._parsed[i]:
+                start, end = self.spans[i]
+                yield source[start:end]
+            else:
+                yield separator + str(e)
+            separator = "\n\n"
+        if source is not None:
+            yield source[self.spans[-1][1] if self.spans else 0:]
+
+    def iter_text(self) -> Iterator[str]:
+        """ :return: An iterator over consecutive pieces of str(self), at most one global expression each. """
+        for piece in self._pieces():
+            yield piece if isinstance(piece, str) else str(piece, ENCODING)
+
+    def write(self, fileobj: BinaryIO):
+        """
+        Writes str(self) to @fileobj one global expression at a time, without formatting it all up front. Text copied
+        from a bytes-like source is written as is.
+        """
+        for piece in self._pieces():
+            fileobj.write(piece.encode(ENCODING) if isinstance(piece, str) else piece)
+
     def __str__(self):
-        return "\n\n".join(str(e) for e in self.global_expr_list)
+        return "".join(self.iter_text())
 
     def __deepcopy__(self, memo={}):
-        return TranslationUnit(*[deepcopy(child, memo) for child in self.global_expr_list])
+        return self  # Immutable
+
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
 
 
 class Assignment(Node):
+    __slots__ = ('identifier', '_value', '_token', '_hash')
+
     def __init__(self, identifier, value):
-        self.identifier = identifier
-        self.value = value
+        _a_identifier(self, sys.intern(identifier))
+        _a_value(self, value)
+        _a_token(self, None)
+        _a_hash(self, None)
+
+    @classmethod
+    def deferred(cls, identifier, token):
+        """
+        :param token: The value exactly as written in the source, quotes included, as a str or as a bytes-like object
+                      such as a memoryview into a memory-mapped lump.
+        :return: An Assignment whose value is decoded and cast from @token the first time it is accessed. Until its
+                 value is reassigned, the Assignment is serialized with @token unchanged.
+        """
+        assignment = cls.__new__(cls)
+        _a_identifier(assignment, sys.intern(identifier))
+        _a_value(assignment, _DEFERRED)
+        _a_token(assignment, token)
+        _a_hash(assignment, None)
+        return assignment
+
+    @classmethod
+    def number(cls, identifier, token: str):
+        """
+        :param token: A number as fixed() formats it, see pyudmf.grammar.fixed.
+        :return: An Assignment written out as @token and cast only if its value is read, or for "nan" and "inf", which
+                 are not UDMF numbers, an Assignment of their Decimal.
+        """
+        if token[-1].isdigit():
+            return cls.deferred(identifier, token)
+        return cls(identifier, Decimal(token))
+
+    @property
+    def token(self):
+        """ :return: The source text of the value if the Assignment was parsed lazily, otherwise None. """
+        if self._token is not None and not isinstance(self._token, str):
+            _a_token(self, str(self._token, ENCODING))
+        return self._token
+
+    @property
+    def value(self):
+        if self._value is _DEFERRED:
+            token = self.token
+            if token.startswith('"'):
+                token = self._unquote(token[1:-1])
+            _a_value(self, self._cast_value(self.identifier, token))
+        return self._value
+
+    def with_value(self, value) -> "Assignment":
+        """ :return: An Assignment of @value to the same identifier. """
+        return Assignment(self.identifier, value)
 
     def __getitem__(self, i):
         children = [self.identifier, self.value]
         return children[i]
 
+    @staticmethod
+    def _unquote(string: str) -> str:
+        """ Converts whitespace escapes in a quoted string the same way pyparsing's QuotedString does. """
+        if '\\' in string:
+            for escape, char in _WHITESPACE_ESCAPES:
+                string = string.replace(escape, char)
+        return string
+
     @staticmethod
     def _cast_value(identifier, value):
-        if identifier in {'x', 'y', 'v1', 'v2', 'id', 'angle', 'sector', 'type', 'sidefront', 'sideback', 'special',
-                          'offsetx', 'offsety', 'arg0', 'arg1', 'arg2', 'arg3', 'arg4', 'heightceiling', 'heightfloor',
-                          'lightlevel', 'xscalefloor', 'yscalefloor', 'xscaleceiling', 'yscaleceiling'}:
-            if '.' in value:
-                value = Decimal(value)
-            else:
-                value = int(value)
-        elif identifier in {'ambush', 'coop', 'dm', 'single', 'skill1', 'skill2', 'skill3', 'skill4', 'skill5',
-                            'blocking', 'blocksound', 'dontpegtop', 'dontpegbottom', 'twosided', 'anycross',
-                            'playercross', 'playeruse', 'monsteruse', 'repeatspecial'}:
-            if value == 'false':
-                value = False
-            elif value == 'true':
-                value = True
-            else:
-                raise ValueError
-        return value
+        """
+        :return: @value cast to the type of property @identifier, see pyudmf.grammar.schema, or @value itself if the
+                 property is unknown or @value does not have its type.
+        """
+        converter = GLOBAL_CONVERTERS.get(identifier)
+        if converter is None:
+            return value
+        return converter(value)
 
     @classmethod
     def group(cls, expr):
@@ -95,10 +273,25 @@ class Assignment(Node):
         return Group(expr).setParseAction(group_action)
 
     def __hash__(self):
-        return hash(str(self))
+        """ :return: A hash of the identifier and value, computed once. """
+        if self._hash is None:
+            _a_hash(self, _assignment_hash(self.identifier, self.value))
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if self.__class__ != other.__class__ or self.identifier != other.identifier:
+            return False
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        value, other_value = self.value, other.value
+        return value.__class__ == other_value.__class__ and value == other_value
 
     def __str__(self):
-        if isinstance(self.value, str):
+        if self._token is not None:
+            value_str = self.token  # Untouched values are written out exactly as they were read
+        elif isinstance(self.value, str):
             value_str = json.dumps(self.value)  # Enforce double quotes for strings
         elif isinstance(self.value, bool):
             value_str = repr(self.value).lower()
@@ -109,17 +302,75 @@ class Assignment(Node):
         return "{} = {};".format(self.identifier, value_str)
 
     def __deepcopy__(self, memo={}):
-        return Assignment(self.identifier, self.value)
+        return self  # Immutable
+
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
 
 
 class Block(Node):
-    def __init__(self, identifier: str, expressions: List[Node]):
+    __slots__ = ('identifier', '_expressions', '_keys', '_values', '_hash')
+
+    def __init__(self, identifier: str, expressions: Sequence[Node]):
         assert isinstance(identifier, str)
-        assert isinstance(expressions, list)
+        assert isinstance(expressions, (list, tuple))
         for e in expressions:
             assert isinstance(e, Node)
-        self.identifier = identifier
-        self.expressions = expressions
+        _b_identifier(self, sys.intern(identifier))
+        _b_expressions(self, tuple(expressions))
+        _b_keys(self, None)
+        _b_values(self, None)
+        _b_hash(self, None)
+
+    @classmethod
+    def packed(cls, identifier: str, keys: Tuple[str, ...], values: Tuple[Any, ...]):
+        """
+        :return: A Block holding its assignments as the parallel tuples @keys and @values. The Assignment nodes are
+                 only created if the expressions of the Block are accessed.
+        """
+        assert len(keys) == len(values)
+        block = cls.__new__(cls)
+        _b_identifier(block, sys.intern(identifier))
+        _b_expressions(block, None)
+        _b_keys(block, tuple(sys.intern(key) for key in keys))
+        _b_values(block, tuple(values))
+        _b_hash(block, None)
+        return block
+
+    @property
+    def expressions(self) -> Tuple[Node, ...]:
+        if self._expressions is None:
+            _b_expressions(self, tuple(Assignment(key, value) for key, value in zip(self._keys, self._values)))
+        return self._expressions
+
+    def with_expr(self, i: int, node: Node) -> "Block":
+        """ :return: A Block with expression @i replaced by @node, sharing all the others. """
+        expressions = list(self.expressions)
+        expressions[i] = node
+        return Block(self.identifier, expressions)
+
+    def with_value(self, identifier: str, value) -> "Block":
+        """
+        :return: A Block with @value assigned to @identifier, in place of its current assignment if there is one, or
+                 appended otherwise.
+        """
+        return self.with_assignment(Assignment(identifier, value))
+
+    def with_assignment(self, assignment: Assignment) -> "Block":
+        """
+        :return: A Block with @assignment in place of the current assignment to its identifier if there is one, or
+                 appended otherwise.
+        """
+        for i, e in enumerate(self.expressions):
+            if isinstance(e, Assignment) and e.identifier == assignment.identifier:
+                return self.with_expr(i, assignment)
+        return Block(self.identifier, self.expressions + (assignment,))
+
+    def items(self) -> Iterable[Tuple[str, Any]]:
+        """ :return: The (identifier, value) pairs of the assignments in the Block, without creating any nodes. """
+        if self._expressions is None:
+            return zip(self._keys, self._values)
+        return ((e.identifier, e.value) for e in self._expressions)
 
     def __getitem__(self, i):
         children = [self.identifier, self.expressions]
@@ -136,11 +387,43 @@ class Block(Node):
         return Group(expr).setParseAction(group_action)
 
     def __hash__(self):
-        return hash(str(self))
+        """
+        :return: A hash of the identifier and expressions, computed once.
+        """
+        if self._hash is None:
+            if self._expressions is None:
+                hashes = tuple(_assignment_hash(key, value) for key, value in zip(self._keys, self._values))
+            else:
+                hashes = tuple(hash(e) for e in self._expressions)
+            _b_hash(self, hash((self.identifier, hashes)))
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if self.__class__ != other.__class__ or self.identifier != other.identifier:
+            return False
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        if self._expressions is None and other._expressions is None:
+            return self._keys == other._keys and all(
+                a.__class__ == b.__class__ and a == b for a, b in zip(self._values, other._values))
+        expressions, other_expressions = self.expressions, other.expressions
+        return len(expressions) == len(other_expressions) and all(
+            a is b or (a.__class__ == b.__class__ and a == b) for a, b in zip(expressions, other_expressions))
 
     def __str__(self):
         expressions_str = "\n".join(str(e) for e in self.expressions)
         return "{}\n{{\n{}\n}}".format(self.identifier, expressions_str)
 
     def __deepcopy__(self, memo={}):
-        return Block(self.identifier, deepcopy(self.expressions, memo))
+        return self  # Immutable
+
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+
+# Slot setters, see pyudmf.immutable
+_t_global_expr_list, _t_spans, _t_source, _t_parsed = setters(TranslationUnit)
+_a_identifier, _a_value, _a_token, _a_hash = setters(Assignment)
+_b_identifier, _b_expressions, _b_keys, _b_values, _b_hash = setters(Block)
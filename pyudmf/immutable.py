@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+"""
+Support for classes with __slots__ whose instances cannot be changed once constructed, such as the nodes of a
+TranslationUnit and the map elements of a Textmap. Such a class sets
+
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+and its constructors, and any lazily computed fields, set slots through the setters that setters() returns.
+"""
+
+from typing import Tuple
+
+
+def immutable(self, name, *value):
+    raise AttributeError("{} is immutable: cannot change {}".format(self.__class__.__name__, name))
+
+
+def setters(cls) -> Tuple:
+    """
+    :return: The setters of the slots of @cls in order. They bypass its __setattr__, and cost less than
+             object.__setattr__ in constructors that are called for every node or map element.
+    """
+    return tuple(cls.__dict__[name].__set__ for name in cls.__slots__)
+
+
+def setstate(self, state):
+    """ Unpickles or copies an instance, whose state is that of any object with __slots__: (None, {slot: value}). """
+    for name, value in state[1].items():
+        object.__setattr__(self, name, value)
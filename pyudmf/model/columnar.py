@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""
+A Textmap held in NumPy arrays, with map elements referring to each other by index. Requires NumPy.
+"""
+
+import numpy as np
+
+from pyudmf.columns import LINEDEF, LINEDEF_FLAGS, SIDEDEF, SECTOR, THING, parse_udmf_columns
+from pyudmf.model.textmap import Order, Textmap, Vertex, Linedef, Sidedef, Sector, Thing, indexed
+
+# The columns of a ColumnarTextmap are those of parse_udmf_columns. Vertices are an (N, 2) array of x and y.
+_BLOCKING = LINEDEF_FLAGS['blocking']
+_SECTOR_FIELDS = ['heightfloor', 'heightceiling', 'texturefloor', 'textureceiling', 'xscalefloor', 'yscalefloor',
+                  'xscaleceiling', 'yscaleceiling']
+
+
+class ColumnarTextmap(object):
+    """
+    The same contents as a Textmap, in one array per kind of map element. Linedefs refer to vertices and sidedefs,
+    and sidedefs to sectors, by their index in the respective array.
+    """
+
+    def __init__(
+            self,
+            namespace="zdoom",
+            vertices: np.ndarray = None,
+            linedefs: np.ndarray = None,
+            sidedefs: np.ndarray = None,
+            sectors: np.ndarray = None,
+            things: np.ndarray = None,
+    ):
+        self.namespace = namespace
+        self.vertices = np.zeros((0, 2)) if vertices is None else np.asarray(vertices, dtype=np.float64)
+        self.linedefs = np.zeros(0, LINEDEF) if linedefs is None else np.asarray(linedefs, dtype=LINEDEF)
+        self.sidedefs = np.zeros(0, SIDEDEF) if sidedefs is None else np.asarray(sidedefs, dtype=SIDEDEF)
+        self.sectors = np.zeros(0, SECTOR) if sectors is None else np.asarray(sectors, dtype=SECTOR)
+        self.things = np.zeros(0, THING) if things is None else np.asarray(things, dtype=THING)
+        assert self.vertices.shape[1:] == (2,)
+
+    @classmethod
+    def parse(cls, textmap_string: str) -> "ColumnarTextmap":
+        """
+        :return: The ColumnarTextmap of a TEXTMAP lump, with the elements of each kind in order of appearance.
+        :raise ValueError: If @textmap_string is not a well-formed TEXTMAP, or a block holds a value that is not a number
+                           where the object model requires one.
+        :raise KeyError: If a block lacks a property the object model requires.
+        """
+        columns = parse_udmf_columns(textmap_string)
+        vertices = columns['vertex'].view(np.float64).reshape(-1, 2)
+        return cls(
+            vertices=vertices,
+            linedefs=columns['linedef'],
+            sidedefs=columns['sidedef'],
+            sectors=columns['sector'],
+            things=columns['thing'],
+        )
+
+    @classmethod
+    def from_textmap(cls, textmap: Textmap) -> "ColumnarTextmap":
+        """
+        :return: The ColumnarTextmap of @textmap, with the elements of each kind in the order of Textmap.order where
+                 known, or else in arbitrary order.
+        """
+        order = textmap.order or Order(textmap.vertices, textmap.sidedefs, textmap.linedefs, textmap.sectors)
+        linedef_list = list(order.linedefs)
+        vertex_list, vertex_ids = indexed(order.vertices, (v for ld in linedef_list for v in (ld.v1, ld.v2)))
+        sidedef_list, sidedef_ids = indexed(
+            order.sidedefs, (sd for ld in linedef_list for sd in (ld.sidefront, ld.sideback) if sd is not None))
+        sector_list, sector_ids = indexed(order.sectors, (sd.sector for sd in sidedef_list))
+        sidedef_ids[id(None)] = -1
+
+        return cls(
+            namespace=textmap.namespace,
+            vertices=np.array([(v.x, v.y) for v in vertex_list], dtype=np.float64).reshape(-1, 2),
+            linedefs=np.array([
+                (vertex_ids[id(ld.v1)], vertex_ids[id(ld.v2)], sidedef_ids[id(ld.sidefront)],
+                 sidedef_ids[id(ld.sideback)], _BLOCKING if ld.blocking else 0)
+                for ld in linedef_list
+            ], dtype=LINEDEF),
+            sidedefs=np.array([
+                (sector_ids[id(sd.sector)], sd.texturemiddle, sd.offsetx, sd.offsety) for sd in sidedef_list
+            ], dtype=SIDEDEF),
+            sectors=np.array([
+                (s.heightfloor, s.heightceiling, s.texturefloor, s.textureceiling, 160, s.xscalefloor,
+                 s.yscalefloor, s.xscaleceiling, s.yscaleceiling)
+                for s in sector_list
+            ], dtype=SECTOR),
+            things=np.array([(t.type, t.x, t.y, 0) for t in textmap.things], dtype=THING),
+        )
+
+    def to_textmap(self) -> Textmap:
+        """
+        :return: The Textmap of this ColumnarTextmap, with index references resolved into objects and the elements of
+                 each kind in Textmap.order as they are in their array.
+        """
+        vertices = [Vertex(x, y) for x, y in self.vertices.tolist()]
+        sectors = [Sector(*row) for row in self.sectors[_SECTOR_FIELDS].tolist()]
+        sidedefs = [Sidedef(sectors[sector], texturemiddle, offsetx, offsety)
+                    for sector, texturemiddle, offsetx, offsety in self.sidedefs.tolist()]
+        linedefs = [
+            Linedef(
+                vertices[v1],
+                vertices[v2],
+                sidefront=sidedefs[sidefront] if sidefront >= 0 else None,
+                sideback=sidedefs[sideback] if sideback >= 0 else None,
+                blocking=bool(flags & _BLOCKING),
+            )
+            for v1, v2, sidefront, sideback, flags in self.linedefs.tolist()
+        ]
+        things = [Thing(thing_type, x, y) for thing_type, x, y, _ in self.things.tolist()]
+        return Textmap(
+            namespace=self.namespace,
+            vertices=vertices,
+            sidedefs=sidedefs,
+            linedefs=linedefs,
+            sectors=sectors,
+            things=things,
+            order=Order(tuple(vertices), tuple(sidedefs), tuple(linedefs), tuple(sectors)),
+        )
+
+    def __repr__(self):
+        return "ColumnarTextmap(vertices={}, sidedefs={}, linedefs={}, sectors={}, things={})".format(
+            len(self.vertices),
+            len(self.sidedefs),
+            len(self.linedefs),
+            len(self.sectors),
+            len(self.things),
+        )
@@ -1,128 +1,130 @@
 #!/usr/bin/env python3
 
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from pyudmf.grammar.tu import TranslationUnit, Block, Assignment
-from pyudmf.model.textmap import Textmap, Vertex, Linedef, Sidedef, Sector, Thing
+from pyudmf.grammar.tu import TranslationUnit, Block
+from pyudmf.model.textmap import Order, Textmap, Vertex, Linedef, Sidedef, Sector, Thing
 from pyudmf.model.visage import SebelinoVisage
 
 
-def block2sector(block: Block):
-    props = dict()
-    for assignment in block.expressions:
-        assert isinstance(assignment, Assignment)
-        assert assignment.identifier not in props  # A property shouldn't be set twice within a block
-        props[assignment.identifier] = assignment.value
+def _props(block: Block) -> Dict[str, Any]:
+    """ :return: The properties of @block, already cast to their types by the parser. """
+    items = list(block.items())
+    props = dict(items)
+    assert len(props) == len(items)  # A property shouldn't be set twice within a block
+    return props
+
+
+class UnsupportedNamespace(ValueError):
+    """ Raised by ast2textmap for a map in a namespace other than zdoom, the only one the model lays out. """
+
+
+_TEXTURE_SCALES = ('xscalefloor', 'yscalefloor', 'xscaleceiling', 'yscaleceiling')
+_OFFSETS = ('offsetx', 'offsety')
+
+
+def _sector(props: Dict[str, Any]) -> Sector:
     return Sector(
         props['heightfloor'] if 'heightfloor' in props else 0,
         props['heightceiling'],
         props['texturefloor'],
         props['textureceiling'],
-        **{k: v for k, v in props.items() if k in {
-            'xscalefloor',
-            'yscalefloor',
-            'xscaleceiling',
-            'yscaleceiling',
-        }}
+        **{k: props[k] for k in _TEXTURE_SCALES if k in props}
     )
 
 
-def block2vertex(block: Block):
-    props = dict()
-    for assignment in block.expressions:
-        assert isinstance(assignment, Assignment)
-        assert assignment.identifier not in props  # A property shouldn't be set twice within a block
-        props[assignment.identifier] = assignment.value
+def _vertex(props: Dict[str, Any]) -> Vertex:
     return Vertex(float(props['x']), float(props['y']))
 
 
-def block2linedef(block: Block, vertices: List[Vertex], sidedefs: List[Sidedef]):
-    props = dict()
-    for assignment in block.expressions:
-        assert isinstance(assignment, Assignment)
-        assert assignment.identifier not in props  # A property shouldn't be set twice within a block
-        props[assignment.identifier] = assignment.value
-    v1 = vertices[props['v1']]
-    v2 = vertices[props['v2']]
-    sidefront = sidedefs[props['sidefront']]
-    sideback = sidedefs[props['sideback']] if 'sideback' in props else None
+def _thing(props: Dict[str, Any]) -> Thing:
+    return Thing(props['type'], float(props['x']), float(props['y']))
+
+
+def _sidedef_refs(props: Dict[str, Any]) -> Tuple[int, str, Dict[str, Any]]:
+    """ :return: The sector index, middle texture and offsets of a sidedef. """
+    return props['sector'], props['texturemiddle'], {k: props[k] for k in _OFFSETS if k in props}
+
+
+def _linedef_refs(props: Dict[str, Any]) -> Tuple[int, int, int, Optional[int], bool]:
+    """ :return: The vertex indices, sidedef indices and blocking flag of a linedef. """
+    return props['v1'], props['v2'], props['sidefront'], props.get('sideback'), props.get('blocking', False)
+
+
+def _sidedef(refs, sectors: List[Sector]) -> Sidedef:
+    sector, texturemiddle, offsets = refs
+    return Sidedef(sectors[sector], texturemiddle, **offsets)
+
+
+def _linedef(refs, vertices: List[Vertex], sidedefs: List[Sidedef]) -> Linedef:
+    v1, v2, sidefront, sideback, blocking = refs
     return Linedef(
-        v1,
-        v2,
-        sidefront=sidefront,
-        sideback=sideback,
-        blocking=props.get('blocking', False),
+        vertices[v1],
+        vertices[v2],
+        sidefront=sidedefs[sidefront],
+        sideback=sidedefs[sideback] if sideback is not None else None,
+        blocking=blocking,
     )
 
 
-def block2sidedef(block: Block, sectors: List[Sector]):
-    props = dict()
-    for assignment in block.expressions:
-        assert isinstance(assignment, Assignment)
-        assert assignment.identifier not in props  # A property shouldn't be set twice within a block
-        props[assignment.identifier] = assignment.value
-    sector = sectors[props['sector']]
-    return Sidedef(
-        sector,
-        props['texturemiddle'],
-        **{k: v for k, v in props.items() if k in {
-            'offsetx',
-            'offsety',
-        }}
-    )
+def block2sector(block: Block):
+    return _sector(_props(block))
 
 
-def block2thing(block: Block):
-    props = dict()
-    for assignment in block.expressions:
-        assert isinstance(assignment, Assignment)
-        assert assignment.identifier not in props  # A property shouldn't be set twice within a block
-        props[assignment.identifier] = assignment.value
-    return Thing(props['type'], float(props['x']), float(props['y']))
+def block2vertex(block: Block):
+    return _vertex(_props(block))
 
 
-def ast2textmap(tu: TranslationUnit) -> (Textmap, Dict):
-    vertices = []
-    sectors = []
-    things = []
-
-    for i, global_expr in enumerate(tu):
-        if isinstance(global_expr, Assignment) and global_expr.identifier == "namespace":
-            assert global_expr.value == "zdoom"
-        elif global_expr.identifier == "sector":
-            sector = block2sector(global_expr)
-            sectors.append(sector)
-        elif global_expr.identifier == "thing":
-            thing = block2thing(global_expr)
-            things.append(thing)
-        elif global_expr.identifier == "vertex":
-            vertex = block2vertex(global_expr)
-            vertices.append(vertex)
-
-    sidedefs = []
-
-    for i, global_expr in enumerate(tu):
-        if isinstance(global_expr, Assignment) and global_expr.identifier == "namespace":
-            pass
-        elif global_expr.identifier == "sidedef":
-            sidedef = block2sidedef(global_expr, sectors)
-            sidedefs.append(sidedef)
-
-    linedefs = []
-
-    for i, global_expr in enumerate(tu):
-        if isinstance(global_expr, Assignment) and global_expr.identifier == "namespace":
-            pass
-        elif global_expr.identifier == "linedef":
-            linedef = block2linedef(global_expr, vertices, sidedefs)
-            linedefs.append(linedef)
+def block2linedef(block: Block, vertices: List[Vertex], sidedefs: List[Sidedef]):
+    return _linedef(_linedef_refs(_props(block)), vertices, sidedefs)
+
+
+def block2sidedef(block: Block, sectors: List[Sector]):
+    return _sidedef(_sidedef_refs(_props(block)), sectors)
+
+
+def block2thing(block: Block):
+    return _thing(_props(block))
+
+
+# Block type -> function from the properties of such a block to what ast2textmap collects of it. Sidedefs and
+# linedefs refer to other blocks by index, so they are collected as indices and resolved once all blocks are read.
+_COLLECTORS = {
+    'sector': _sector,
+    'thing': _thing,
+    'vertex': _vertex,
+    'sidedef': _sidedef_refs,
+    'linedef': _linedef_refs,
+}
+
+
+def ast2textmap(tu: TranslationUnit) -> Textmap:
+    collected = {identifier: [] for identifier in _COLLECTORS}
+    collectors = {identifier: (collect, collected[identifier].append) for identifier, collect in _COLLECTORS.items()}
+
+    for global_expr in tu:
+        if isinstance(global_expr, Block):
+            entry = collectors.get(global_expr.identifier)
+            if entry is not None:
+                collect, append = entry
+                append(collect(_props(global_expr)))
+        elif global_expr.identifier == "namespace":
+            if global_expr.value != "zdoom":
+                raise UnsupportedNamespace("Unsupported namespace {!r}: only zdoom maps can be laid out anew, scale"
+                                           " them with --preserve instead".format(global_expr.value))
+
+    vertices = collected['vertex']
+    sectors = collected['sector']
+    sidedefs = [_sidedef(refs, sectors) for refs in collected['sidedef']]
+    linedefs = [_linedef(refs, vertices, sidedefs) for refs in collected['linedef']]
 
     textmap = Textmap(
         vertices=set(vertices),
         linedefs=set(linedefs),
         sidedefs=set(sidedefs),
         sectors=set(sectors),
-        things=tuple(things),
+        things=tuple(collected['thing']),
+        order=Order(tuple(vertices), tuple(sidedefs), tuple(linedefs), tuple(sectors)),
     )
 
     return textmap
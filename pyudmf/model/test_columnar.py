@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pyudmf.model.columnar import ColumnarTextmap  # noqa: E402
+from pyudmf.model.factory import ast2textmap  # noqa: E402
+from pyudmf.model.textmap import Textmap  # noqa: E402
+from pyudmf.model.visage import IndexPreservingVisage  # noqa: E402
+from pyudmf.parser import parse_udmf  # noqa: E402
+
+_textmap = """namespace = "zdoom";
+thing { x = 32.000; y = 32.000; type = 1; }
+vertex { x = 0.000; y = 0.000; }
+vertex { x = 64.000; y = 0.000; }
+vertex { x = 0.000; y = 64.000; }
+linedef { v1 = 0; v2 = 1; sidefront = 0; blocking = true; }
+linedef { v1 = 1; v2 = 2; sidefront = 1; sideback = 2; }
+linedef { v1 = 2; v2 = 0; sidefront = 3; blocking = true; }
+sidedef { sector = 0; texturemiddle = "MARBFACE"; }
+sidedef { sector = 0; texturemiddle = "MARBFACE"; offsetx = 16; }
+sidedef { sector = 1; texturemiddle = "-"; }
+sidedef { sector = 0; texturemiddle = "MARBFACE"; offsety = -8; }
+sector { heightceiling = 128; texturefloor = "CEIL3_3"; textureceiling = "CEIL3_3"; }
+sector { heightfloor = 8; heightceiling = 96; texturefloor = "FLAT1"; textureceiling = "FLAT2"; xscalefloor = 2.0; }
+"""
+
+
+def test_parse():
+    columnar = ColumnarTextmap.parse(_textmap)
+    assert columnar.vertices.tolist() == [[0.0, 0.0], [64.0, 0.0], [0.0, 64.0]]
+    assert columnar.linedefs.tolist() == [(0, 1, 0, -1, 1), (1, 2, 1, 2, 0), (2, 0, 3, -1, 1)]
+    assert columnar.sidedefs['offsetx'].tolist() == [0, 16, 0, 0]
+    assert columnar.sectors[1].tolist() == (8, 96, 'FLAT1', 'FLAT2', 160, 2.0, 1.0, 1.0, 1.0)
+    assert columnar.things.tolist() == [(1, 32.0, 32.0, 0)]
+    assert columnar.to_textmap() == ast2textmap(parse_udmf(_textmap))
+
+
+def test_order():
+    textmap = ast2textmap(parse_udmf(_textmap))
+    columnar = ColumnarTextmap.parse(_textmap)
+
+    returned = columnar.to_textmap()
+
+    assert returned.order is not None
+    assert str(IndexPreservingVisage().textmap2ast(returned)) == str(IndexPreservingVisage().textmap2ast(textmap))
+    assert ColumnarTextmap.from_textmap(returned).linedefs.tolist() == columnar.linedefs.tolist()
+
+
+def test_parse_empty():
+    columnar = ColumnarTextmap.parse('')
+    assert columnar.vertices.shape == (0, 2)
+    assert columnar.to_textmap() == Textmap()
+
+
+def test_from_textmap():
+    textmap = ast2textmap(parse_udmf(_textmap))
+    columnar = ColumnarTextmap.from_textmap(textmap)
+    assert columnar.to_textmap() == textmap
+    assert sorted(columnar.sectors['xscalefloor'].tolist()) == [1.0, 2.0]
+    assert ColumnarTextmap.from_textmap(Textmap()).to_textmap() == Textmap()
+
+
+def test_from_textmap_offsets():
+    # The sidedefs differ only in offsets, so compare equal
+    textmap = ast2textmap(parse_udmf("""namespace = "zdoom";
+        vertex { x = 0.0; y = 0.0; }
+        vertex { x = 64.0; y = 0.0; }
+        linedef { v1 = 0; v2 = 1; sidefront = 1; }
+        linedef { v1 = 1; v2 = 0; sidefront = 0; }
+        sidedef { sector = 0; texturemiddle = "STONE2"; offsetx = 8; }
+        sidedef { sector = 0; texturemiddle = "STONE2"; offsety = 4; }
+        sector { heightceiling = 128; texturefloor = "FLAT1"; textureceiling = "FLAT1"; }
+    """, backend="scanner"))
+
+    columnar = ColumnarTextmap.from_textmap(textmap)
+
+    assert columnar.linedefs.tolist() == [(0, 1, 1, -1, 0), (1, 0, 0, -1, 0)]
+    assert columnar.sidedefs[['offsetx', 'offsety']].tolist() == [(8, 0), (0, 4)]
+    returned = columnar.to_textmap()
+    assert returned == textmap
+    assert {(ld.sidefront.offsetx, ld.sidefront.offsety) for ld in returned.linedefs} == {(8, 0), (0, 4)}
+
+
+def test_parse_float_tokens():
+    textmap = 'sector { heightfloor = 8.0; heightceiling = 128; texturefloor = "F"; textureceiling = "C"; }'
+    expected = ast2textmap(parse_udmf(textmap))
+    returned = ColumnarTextmap.parse(textmap).to_textmap()
+    assert returned == expected
+    assert [s.heightfloor for s in returned.sectors] == [s.heightfloor for s in expected.sectors] == [8]
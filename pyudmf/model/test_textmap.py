@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 
+import io
+import pickle
+from copy import deepcopy
 from decimal import Decimal
 
 import pytest
@@ -8,7 +11,8 @@ from pyudmf.grammar.tu import TranslationUnit, Assignment, Block
 from pyudmf.model.cycle import Cycle
 from pyudmf.model.factory import ast2textmap
 from pyudmf.model.textmap import Textmap, Vertex, Linedef, Sector, Sidedef, Thing
-from pyudmf.model.visage import SebelinoVisage
+from pyudmf.model.visage import IndexPreservingVisage, SebelinoVisage
+from pyudmf.parser import parse_udmf
 
 
 @pytest.fixture
@@ -340,6 +344,31 @@ class TestDuosector(object):
             Cycle([linedefs[4], linedefs[5], linedefs[6], linedefs[2]]),
         }
         assert cycles == expected
+        assert textmap.cycles() is cycles
+
+    def test_sides(self, textmap, linedefs):
+        left = Cycle([linedefs[0], linedefs[1], linedefs[2], linedefs[3]])
+        right = Cycle([linedefs[4], linedefs[5], linedefs[6], linedefs[2]])
+        sides = textmap.sides()
+        assert sides[linedefs[0]] == (left, None)
+        assert sides[linedefs[2]] == (left, right)
+        assert sides[linedefs[5]] == (right, None)
+        assert set(sides) == set(linedefs)
+        assert textmap.sides() is sides
+
+    def test_adjacency(self, textmap, linedefs):
+        adjacency = textmap.adjacency()
+        assert set(adjacency[Vertex(64.0, 64.0)].outgoing) == {linedefs[2], linedefs[4]}
+        assert adjacency[Vertex(64.0, 64.0)].incoming == (linedefs[1],)
+        assert textmap.adjacency() is adjacency
+        assert set(textmap.incident(Vertex(0.0, 0.0))) == {linedefs[0], linedefs[3]}
+        assert textmap.incident(Vertex(32.0, 32.0)) == ()
+
+    def test_degree(self, textmap, linedefs):
+        assert textmap.degree(Vertex(64.0, 64.0)) == 3
+        assert textmap.degree(Vertex(64.0, 64.0), {linedefs[1], linedefs[4], linedefs[5]}) == 2
+        assert textmap.degree(Vertex(0.0, 0.0), frozenset()) == 0
+        assert textmap.degree(Vertex(32.0, 32.0)) == 0
 
     def test_ast2textmap(self, ast, textmap):
         returned = ast2textmap(ast)
@@ -356,6 +385,13 @@ class TestDuosector(object):
         assert [x for x in ast if x.identifier == "sidedef"] == [x for x in returned if x.identifier == "sidedef"]
         assert [x for x in ast if x.identifier == "sector"] == [x for x in returned if x.identifier == "sector"]
         assert ast == returned
+        assert visage.textmap2ast(textmap) == returned
+
+    def test_write(self, textmap):
+        visage = SebelinoVisage()
+        buffer = io.BytesIO()
+        visage.write(textmap, buffer)
+        assert buffer.getvalue() == str(visage.textmap2ast(textmap)).encode()
 
     def test_bijection(self, textmap):
         visage = SebelinoVisage()
@@ -674,3 +710,100 @@ class TestTwoByTwoSector(object):
         assert [x for x in ast if x.identifier == "sidedef"] == [x for x in returned if x.identifier == "sidedef"]
         assert [x for x in ast if x.identifier == "sector"] == [x for x in returned if x.identifier == "sector"]
         assert ast == returned
+
+
+def test_cycles_islands_and_bridges():
+    sidedef = Sidedef(Sector(0, 128, "CEIL3_3", "CEIL3_3"), "MARBFACE")
+
+    def loop(*points):
+        return [Linedef(Vertex(*a), Vertex(*b), sidefront=sidedef) for a, b in zip(points, points[1:] + points[:1])]
+
+    outer = loop((0.0, 0.0), (0.0, 256.0), (256.0, 256.0), (256.0, 0.0))
+    pillar = loop((64.0, 64.0), (64.0, 128.0), (96.0, 128.0), (128.0, 96.0), (128.0, 64.0))
+    bridge = Linedef(Vertex(0.0, 0.0), Vertex(64.0, 64.0), sidefront=sidedef)
+    dangling = Linedef(Vertex(256.0, 256.0), Vertex(192.0, 192.0), sidefront=sidedef)
+    linedefs = outer + pillar + [bridge, dangling]
+    textmap = Textmap(
+        vertices={ld.v1 for ld in linedefs},
+        sectors={sidedef.sector},
+        sidedefs={sidedef},
+        linedefs=linedefs,
+    )
+
+    assert textmap.cycles() == {Cycle(outer), Cycle(pillar)}
+
+
+def test_index_preserving_visage():
+    textmap = ast2textmap(parse_udmf("""namespace = "zdoom";
+        vertex { x = 64.0; y = 0.0; }
+        vertex { x = 0.0; y = 0.0; }
+        vertex { x = 0.0; y = 64.0; }
+        linedef { v1 = 2; v2 = 0; sidefront = 1; }
+        linedef { v1 = 0; v2 = 1; sidefront = 1; }
+        linedef { v1 = 1; v2 = 2; sidefront = 0; }
+        sidedef { sector = 1; texturemiddle = "STONE2"; offsetx = 8; }
+        sidedef { sector = 1; texturemiddle = "STONE2"; }
+        sector { heightceiling = 128; texturefloor = "FLAT1"; textureceiling = "FLAT1"; }
+        sector { heightfloor = 16; heightceiling = 128; texturefloor = "FLAT1"; textureceiling = "FLAT1"; }
+    """, backend="scanner"))
+
+    returned = IndexPreservingVisage().textmap2ast(textmap)
+
+    blocks = [(b.identifier, dict(b.items())) for b in returned if isinstance(b, Block)]
+    assert blocks == [
+        ('vertex', {'x': Decimal('64.000'), 'y': Decimal('0.000')}),
+        ('vertex', {'x': Decimal('0.000'), 'y': Decimal('0.000')}),
+        ('vertex', {'x': Decimal('0.000'), 'y': Decimal('64.000')}),
+        ('linedef', {'v1': 2, 'v2': 0, 'sidefront': 1, 'blocking': False}),
+        ('linedef', {'v1': 0, 'v2': 1, 'sidefront': 1, 'blocking': False}),
+        ('linedef', {'v1': 1, 'v2': 2, 'sidefront': 0, 'blocking': False}),
+        ('sidedef', {'sector': 1, 'texturemiddle': 'STONE2', 'offsetx': 8}),
+        ('sidedef', {'sector': 1, 'texturemiddle': 'STONE2'}),
+        ('sector', {'heightceiling': 128, 'texturefloor': 'FLAT1', 'textureceiling': 'FLAT1'}),
+        ('sector', {'heightceiling': 128, 'heightfloor': 16, 'texturefloor': 'FLAT1', 'textureceiling': 'FLAT1'}),
+    ]
+    assert ast2textmap(returned) == textmap
+    buffer = io.BytesIO()
+    IndexPreservingVisage().write(textmap, buffer)
+    assert buffer.getvalue() == str(returned).encode()
+
+
+def test_index_preserving_visage_unordered():
+    sector = Sector(0, 128, "CEIL3_3", "CEIL3_3")
+    sidedef = Sidedef(sector, "MARBFACE")
+    # Refers to a sidedef equal to, but not the same as, the one the Textmap holds
+    linedef = Linedef(Vertex(0.0, 0.0), Vertex(0.0, 64.0), sidefront=Sidedef(sector, "MARBFACE"))
+    textmap = Textmap(vertices={linedef.v1, linedef.v2}, sidedefs={sidedef}, linedefs={linedef}, sectors={sector})
+
+    returned = ast2textmap(IndexPreservingVisage().textmap2ast(textmap))
+
+    assert returned == textmap
+
+
+def test_visage_coordinates():
+    textmap = Textmap(things=[Thing(1, float('inf'), -0.0), Thing(2, 1 / 3, 2.0 ** 60)])
+
+    returned = str(IndexPreservingVisage().textmap2ast(textmap))
+
+    assert "x = Infinity;\ny = -0.000;\n" in returned
+    assert "x = 0.333;\ny = 1152921504606846976.000;\n" in returned
+
+
+_sector = Sector(0, 128, "CEIL3_3", "CEIL3_3")
+
+
+@pytest.mark.parametrize("element, name", [
+    (Vertex(0.0, 64.0), 'x'),
+    (_sector, 'heightfloor'),
+    (Sidedef(_sector, "MARBFACE"), 'offsetx'),
+    (Linedef(Vertex(0.0, 0.0), Vertex(0.0, 64.0), sidefront=Sidedef(_sector, "MARBFACE")), 'sidefront'),
+    (Thing(1, 32.0, 32.0), '_hash'),
+])
+def test_immutable(element, name):
+    with pytest.raises(AttributeError):
+        setattr(element, name, None)
+    with pytest.raises(AttributeError):
+        delattr(element, name)
+    for copied in (deepcopy(element), pickle.loads(pickle.dumps(element))):
+        assert copied == element and hash(copied) == hash(element)
+
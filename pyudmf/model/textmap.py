@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 
-from typing import AbstractSet, List, Set, Tuple, Optional
+from collections import defaultdict, namedtuple
+from math import atan2
+from typing import AbstractSet, Dict, Iterable, List, Set, Tuple, Optional
 
+from pyudmf.immutable import immutable, setstate, setters
 from pyudmf.model.cycle import Cycle
 
 
+# The map elements below are values: they cannot be modified once constructed, and each computes its hash from the
+# fields its equality compares right away. Elements referring to others hash those by their precomputed hashes.
+
+
 class Vertex(object):
+    __slots__ = ('x', 'y', '_hash')
+
     def __init__(self, x: float, y: float):
-        self.x = float(x)
-        self.y = float(y)
+        _vertex_x(self, float(x))
+        _vertex_y(self, float(y))
+        _vertex_hash(self, hash((self.x, self.y)))
 
     def __add__(self, other: "Vertex"):
         return Vertex(self.x + other.x, self.y + other.y)
@@ -26,55 +36,83 @@ class Vertex(object):
         return "Vertex({}, {})".format(self.x, self.y)
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other, Vertex) and self.x == other.x and self.y == other.y
 
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+
+_vertex_x, _vertex_y, _vertex_hash = setters(Vertex)
+
 
 class Sector(object):
+    __slots__ = ('heightfloor', 'heightceiling', 'texturefloor', 'textureceiling', 'xscalefloor', 'yscalefloor',
+                 'xscaleceiling', 'yscaleceiling', '_hash')
+
     def __init__(self, heightfloor: int, heightceiling: int, texturefloor: str, textureceiling: str,
                  xscalefloor: float = 1.0, yscalefloor: float = 1.0, xscaleceiling: float = 1.0,
                  yscaleceiling: float = 1.0):
-        self.heightfloor = int(heightfloor)
-        self.heightceiling = int(heightceiling)
-        self.texturefloor = str(texturefloor)
-        self.textureceiling = str(textureceiling)
-        self.xscalefloor = float(xscalefloor)
-        self.yscalefloor = float(yscalefloor)
-        self.xscaleceiling = float(xscaleceiling)
-        self.yscaleceiling = float(yscaleceiling)
+        _sector_heightfloor(self, int(heightfloor))
+        _sector_heightceiling(self, int(heightceiling))
+        _sector_texturefloor(self, str(texturefloor))
+        _sector_textureceiling(self, str(textureceiling))
+        _sector_xscalefloor(self, float(xscalefloor))
+        _sector_yscalefloor(self, float(yscalefloor))
+        _sector_xscaleceiling(self, float(xscaleceiling))
+        _sector_yscaleceiling(self, float(yscaleceiling))
+        _sector_hash(self, hash((self.heightceiling, self.texturefloor, self.textureceiling)))
 
     def __repr__(self):
         return "Sector({}, {}, {}, {})".format(self.heightfloor, self.heightceiling, repr(self.texturefloor),
                                                repr(self.textureceiling))
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other,
                           Sector) and self.heightceiling == other.heightceiling and self.texturefloor == other.texturefloor and self.textureceiling == other.textureceiling
 
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+
+(_sector_heightfloor, _sector_heightceiling, _sector_texturefloor, _sector_textureceiling, _sector_xscalefloor,
+ _sector_yscalefloor, _sector_xscaleceiling, _sector_yscaleceiling, _sector_hash) = setters(Sector)
+
 
 class Sidedef(object):
+    __slots__ = ('sector', 'texturemiddle', 'offsetx', 'offsety', '_hash')
+
     def __init__(self, sector: Sector, texturemiddle: str, offsetx: int = 0, offsety: int = 0):
-        self.sector = sector
-        self.texturemiddle = texturemiddle
-        self.offsetx = offsetx
-        self.offsety = offsety
+        _sidedef_sector(self, sector)
+        _sidedef_texturemiddle(self, texturemiddle)
+        _sidedef_offsetx(self, offsetx)
+        _sidedef_offsety(self, offsety)
+        _sidedef_hash(self, hash((sector._hash, texturemiddle)))
 
     def __repr__(self):
         return "Sidedef({}, {})".format(self.sector, repr(self.texturemiddle))
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other, Sidedef) and self.sector == other.sector and self.texturemiddle == other.texturemiddle
 
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+
+_sidedef_sector, _sidedef_texturemiddle, _sidedef_offsetx, _sidedef_offsety, _sidedef_hash = setters(Sidedef)
+
 
 class Linedef(object):
+    __slots__ = ('v1', 'v2', 'sidefront', 'sideback', 'blocking', '_hash')
+
     def __init__(
             self,
             v1: Vertex,
@@ -84,16 +122,12 @@ class Linedef(object):
             blocking: bool = False
     ):
         assert v1 != v2
-        self.v1 = v1
-        self.v2 = v2
-        if sidefront is not None:
-            assert isinstance(sidefront, Sidedef)
-        self.sidefront = sidefront
-        if sideback is not None:
-            assert isinstance(sideback, Sidedef)
-        self.sideback = sideback
-        assert isinstance(blocking, bool)
-        self.blocking = blocking
+        _linedef_v1(self, v1)
+        _linedef_v2(self, v2)
+        _linedef_sidefront(self, sidefront)
+        _linedef_sideback(self, sideback)
+        _linedef_blocking(self, blocking)
+        _linedef_hash(self, hash((v1._hash, v2._hash, None if sidefront is None else sidefront._hash)))
 
     def __repr__(self):
         args = [self.v1, self.v2]
@@ -107,28 +141,66 @@ class Linedef(object):
         return s
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other,
                           Linedef) and self.v1 == other.v1 and self.v2 == other.v2 and self.sidefront == other.sidefront
 
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+
+_linedef_v1, _linedef_v2, _linedef_sidefront, _linedef_sideback, _linedef_blocking, _linedef_hash = setters(Linedef)
+
 
 class Thing(object):
+    __slots__ = ('x', 'y', 'type', '_hash')
+
     def __init__(self, thing_type: int, x: float, y: float):
-        self.x = x
-        self.y = y
-        self.type = thing_type
+        _thing_x(self, x)
+        _thing_y(self, y)
+        _thing_type(self, thing_type)
+        _thing_hash(self, hash((x, y, thing_type)))
 
     def __repr__(self):
         return "Thing({}, {}, {})".format(self.type, self.x, self.y)
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other, Thing) and self.x == other.x and self.y == other.y and self.type == other.type
 
+    __setattr__ = __delattr__ = immutable
+    __setstate__ = setstate
+
+
+_thing_x, _thing_y, _thing_type, _thing_hash = setters(Thing)
+
+
+Incidence = namedtuple('Incidence', ['outgoing', 'incoming'])
+Sides = namedtuple('Sides', ['front', 'back'])
+
+# The map elements of each kind in their original index order, with elements that compare equal kept apart. Linedefs
+# and sidedefs refer to the very objects listed here.
+Order = namedtuple('Order', ['vertices', 'sidedefs', 'linedefs', 'sectors'])
+
+
+def indexed(members: Iterable, referenced: Iterable) -> Tuple[List, Dict[int, int]]:
+    """
+    :return: A list of @members followed by any @referenced items that are not members, and a dictionary from the id
+             of each item to its index in that list. Items are told apart by identity, as map elements that compare
+             equal may still differ.
+    """
+    items = list(members)
+    ids = {id(item): i for i, item in enumerate(items)}
+    for item in referenced:
+        if id(item) not in ids:
+            ids[id(item)] = len(items)
+            items.append(item)
+    return items, ids
+
 
 class Textmap(object):
     """
@@ -143,52 +215,65 @@ class Textmap(object):
             linedefs: AbstractSet[Linedef] = frozenset(),
             sectors: AbstractSet[Sector] = frozenset(),
             things: Tuple[Thing] = tuple(),
+            order: Optional[Order] = None,
     ):
+        """
+        :param order: The index order of the map elements, if it is known and worth keeping.
+        """
         self.namespace = namespace
         self.vertices = frozenset(vertices)
         self.sidedefs = frozenset(sidedefs)
         self.linedefs = frozenset(linedefs)
         self.sectors = frozenset(sectors)
         self.things = tuple(things)  # Actually multiset
+        self.order = order
+        self._adjacency = None
+        self._cycles = None
+        self._sides = None
 
-    @classmethod
-    def _find_cycle(cls, linedef_sets: List[Set[Linedef]], cycles: List[List[Linedef]]):
+    def adjacency(self) -> Dict[Vertex, Incidence]:
         """
-        :return: Any cycle that encloses one sector, or None if no such cycle exists.
+        :return: The linedefs starting and ending at each vertex that has any. Built on first use and kept, as a
+                 Textmap is not to be modified.
         """
-        next_linedef_sets = []
-        next_cycles = []
-        for i, linedefs in enumerate(linedef_sets):
-            if not linedefs:
-                return None
-            cycle = cycles[i]
-            if not cycle:
-                neighbor_linedefs = [next(iter(linedefs))]
-            else:
-                linedef = cycle[-1]
-                neighbor_linedefs = [ld for ld in linedefs if {linedef.v1, linedef.v2}.intersection({ld.v1, ld.v2})]
-                neighbor_linedefs = [ld for ld in neighbor_linedefs if cls.degree(ld.v1, frozenset(cycle)) <= 1]
-                neighbor_linedefs = [ld for ld in neighbor_linedefs if cls.degree(ld.v2, frozenset(cycle)) <= 1]
-            if not neighbor_linedefs:
-                continue
-            for neighbor in neighbor_linedefs:
-                next_linedef_set = linedefs.difference({neighbor})
-                next_linedef_sets.append(next_linedef_set)
-                next_cycle = cycle + [neighbor]
-                next_cycles.append(next_cycle)
-        for cycle in next_cycles:
-            if len(cycle) >= 3 and cycle[0].v1 in {cycle[-1].v1, cycle[-1].v2}:
-                return tuple(cycle)
-        return cls._find_cycle(next_linedef_sets, next_cycles)
-
-    @classmethod
-    def degree(cls, vertex: Vertex, linedefs: AbstractSet[Linedef]):
+        if self._adjacency is None:
+            outgoing = defaultdict(list)
+            incoming = defaultdict(list)
+            for ld in self.linedefs:
+                outgoing[ld.v1].append(ld)
+                incoming[ld.v2].append(ld)
+            self._adjacency = {
+                v: Incidence(tuple(outgoing.get(v, ())), tuple(incoming.get(v, ())))
+                for v in set(outgoing).union(incoming)
+            }
+        return self._adjacency
+
+    def incident(self, vertex: Vertex) -> Tuple[Linedef, ...]:
+        """ :return: The linedefs starting or ending at @vertex. """
+        incidence = self.adjacency().get(vertex)
+        return () if incidence is None else incidence.outgoing + incidence.incoming
+
+    def _prune(self, linedefs: Set[Linedef], candidates: Iterable[Linedef]):
+        """
+        Removes from @linedefs every linedef that has an end no other linedef in @linedefs meets, as no such linedef
+        lies on a cycle. Only @candidates and, as linedefs are removed, their neighbors are examined.
+        """
+        stack = list(candidates)
+        while stack:
+            ld = stack.pop()
+            if ld in linedefs and (self.degree(ld.v1, linedefs) < 2 or self.degree(ld.v2, linedefs) < 2):
+                linedefs.remove(ld)
+                stack.extend(self.incident(ld.v1))
+                stack.extend(self.incident(ld.v2))
+
+    def degree(self, vertex: Vertex, linedefs: Optional[AbstractSet[Linedef]] = None) -> int:
         """
-        :return: The indegree + outdegree of a vertex in the graph
+        :param linedefs: A subset of the linedefs of the Textmap, or None for all of them.
+        :return: The indegree + outdegree of a vertex in the graph of @linedefs
         """
-        out_vertices = {ld for ld in linedefs if ld.v1 == vertex}
-        in_vertices = {ld for ld in linedefs if ld.v2 == vertex}
-        return len(out_vertices) + len(in_vertices)
+        if linedefs is None:
+            return len(self.incident(vertex))
+        return sum(1 for ld in self.incident(vertex) if ld in linedefs)
 
     @staticmethod
     def determinant(ax, ay, bx, by, cx, cy):
@@ -211,24 +296,94 @@ class Textmap(object):
         else:
             raise NotImplementedError("Zero determinant -- all three vertices are colinear")
 
+    @staticmethod
+    def _face_walks(linedefs: List[Linedef]) -> List[List[int]]:
+        """
+        :param linedefs: The edges of a plane graph.
+        :return: The boundary walk of every face of the graph, as a list of half-edges: half-edge 2i runs along
+                 linedefs[i] from v1 to v2, and half-edge 2i + 1 from v2 to v1. Each face lies to the left of its
+                 half-edges, so bounded faces are walked counterclockwise and unbounded ones clockwise.
+        """
+        origins = [v for ld in linedefs for v in (ld.v1, ld.v2)]
+        outgoing = defaultdict(list)
+        for h, v in enumerate(origins):
+            outgoing[v].append(h)
+        position = [0] * len(origins)
+        for v, half_edges in outgoing.items():
+            half_edges.sort(key=lambda h: atan2(origins[h ^ 1].y - v.y, origins[h ^ 1].x - v.x))
+            for i, h in enumerate(half_edges):
+                position[h] = i
+
+        walks = []
+        visited = [False] * len(origins)
+        for start in range(len(origins)):
+            walk = []
+            h = start
+            while not visited[h]:
+                visited[h] = True
+                walk.append(h)
+                # Continue with the half-edge leaving the end of h just clockwise of the way back
+                twin = h ^ 1
+                h = outgoing[origins[twin]][position[twin] - 1]
+            if walk:
+                walks.append(walk)
+        return walks
+
     def cycles(self) -> AbstractSet[Cycle]:
         """
-        :return: A set of sequences of linedefs such that each sequence of linedefs encloses a sector.
+        :return: A set of sequences of linedefs such that each sequence of linedefs encloses a sector. These are the
+                 bounded faces of the plane graph of the linedefs that lie on a cycle, found in O(E log E) by
+                 walking face boundaries. Computed on first use and kept, as a Textmap is not to be modified.
         """
-        cycles = set()
+        if self._cycles is None:
+            self._cycles, self._sides = self._faces()
+        return self._cycles
+
+    def sides(self) -> Dict[Linedef, Sides]:
+        """
+        :return: The cycle on the front (right) and on the back (left) of every linedef, either being None where no
+                 cycle lies. Found along with the cycles and kept.
+        """
+        if self._sides is None:
+            self._cycles, self._sides = self._faces()
+        return self._sides
+
+    def _faces(self) -> Tuple[AbstractSet[Cycle], Dict[Linedef, Sides]]:
         linedefs = set(self.linedefs)
-        while linedefs:
-            linedefs = {ld for ld in linedefs if
-                        self.degree(ld.v1, linedefs) >= 2 and self.degree(ld.v2, linedefs) >= 2}
-            cycle = self._find_cycle([linedefs], [[]])
-            if cycle:
-                cycles.add(cycle)
-                cycle_subset = {ld for ld in cycle if
-                                self.degree(ld.v1, linedefs) == 2 or self.degree(ld.v2, linedefs) == 2}
-                linedefs = linedefs.difference(cycle_subset)
-        cycles = frozenset([Cycle(c) for c in cycles])
-        cycles = frozenset([self.negatively_orient(c) for c in cycles])
-        return cycles
+        self._prune(linedefs, self.linedefs)
+        linedefs = list(linedefs)
+        walks = self._face_walks(linedefs)
+
+        # A linedef with the same face on both sides lies on no cycle, but joins two parts of the graph
+        face = [0] * (2 * len(linedefs))
+        for i, walk in enumerate(walks):
+            for h in walk:
+                face[h] = i
+        bridges = {i for i in range(len(linedefs)) if face[2 * i] == face[2 * i + 1]}
+        if bridges:
+            linedefs = [ld for i, ld in enumerate(linedefs) if i not in bridges]
+            walks = self._face_walks(linedefs)
+
+        cycles = set()
+        sides = {ld: [None, None] for ld in self.linedefs}
+        for walk in walks:
+            points = [linedefs[h >> 1].v2 if h & 1 else linedefs[h >> 1].v1 for h in walk]
+            area = sum(a.x * b.y - b.x * a.y for a, b in zip(points, points[1:] + points[:1]))
+            if area <= 0:
+                continue  # Unbounded, or degenerate
+            # Start at a convex corner, where the turn between the first two linedefs gives the orientation of
+            # the whole cycle
+            n = len(points)
+            corner = next((i for i in range(n) if self.determinant(
+                points[i - 1].x, points[i - 1].y, points[i].x, points[i].y,
+                points[(i + 1) % n].x, points[(i + 1) % n].y) > 0), 0)
+            walk = walk[corner - 1:] + walk[:corner - 1]
+            cycle = self.negatively_orient(Cycle(tuple(linedefs[h >> 1] for h in walk)))
+            cycles.add(cycle)
+            for h in walk:
+                # The face is to the left of h, so to the right, the front, of its linedef if h runs from v2 to v1
+                sides[linedefs[h >> 1]][0 if h & 1 else 1] = cycle
+        return frozenset(cycles), {ld: Sides(*pair) for ld, pair in sides.items()}
 
     def __eq__(self, other):
         return all([
@@ -1,12 +1,61 @@
 #!/usr/bin/env python3
 
 from abc import abstractmethod, ABCMeta
-from decimal import Decimal
-from typing import Tuple, Dict, Any
+from collections import namedtuple
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Sequence, Tuple
 
-from pyudmf.grammar.tu import TranslationUnit, Assignment, Block
-from pyudmf.model.cycle import Cycle
-from pyudmf.model.textmap import Textmap, Sector, Sidedef
+from pyudmf.grammar.fixed import fixed, fixed_all
+from pyudmf.grammar.tu import ENCODING, TranslationUnit, Assignment, Block, Node
+from pyudmf.model.textmap import Order, Textmap, Linedef, Sector, Sidedef, Sides, Thing
+
+# What every stage of a SebelinoVisage export reads: the vertices in output order and their indices, the linedefs in
+# output order, the cycles of the Textmap and the cycles on either side of each linedef
+ExportContext = namedtuple('ExportContext', ['vertices', 'vertex_ids', 'linedefs', 'faces', 'sides'])
+
+
+# Coordinates are formatted this many at a time, so that blocks are still made as they are reached
+_CHUNK = 1024
+
+
+def _with_coordinates(elements: Sequence) -> Iterator[Tuple[Any, str, str]]:
+    """ :return: An iterator over the elements of @elements, each with its x and y formatted to 3 places. """
+    for start in range(0, len(elements), _CHUNK):
+        chunk = elements[start:start + _CHUNK]
+        yield from zip(chunk, fixed_all([e.x for e in chunk], 3), fixed_all([e.y for e in chunk], 3))
+
+
+def _thing_block(t: Thing, x: str, y: str) -> Block:
+    return Block("thing", [
+        Assignment.number("x", x),
+        Assignment.number("y", y),
+        Assignment("type", t.type),
+    ])
+
+
+def _vertex_block(x: str, y: str) -> Block:
+    return Block("vertex", [
+        Assignment.number("x", x),
+        Assignment.number("y", y),
+    ])
+
+
+def _sector_block(s: Sector) -> Block:
+    blocklist = [
+        Assignment("heightceiling", s.heightceiling),
+        Assignment("texturefloor", s.texturefloor),
+        Assignment("textureceiling", s.textureceiling),
+    ]
+    if s.heightfloor:
+        blocklist.append(Assignment("heightfloor", s.heightfloor))
+    if s.xscalefloor != 1.0:
+        blocklist.append(Assignment.number("xscalefloor", fixed(s.xscalefloor, 6)))
+    if s.yscalefloor != 1.0:
+        blocklist.append(Assignment.number("yscalefloor", fixed(s.yscalefloor, 6)))
+    if s.xscaleceiling != 1.0:
+        blocklist.append(Assignment.number("xscaleceiling", fixed(s.xscaleceiling, 6)))
+    if s.yscaleceiling != 1.0:
+        blocklist.append(Assignment.number("yscaleceiling", fixed(s.yscaleceiling, 6)))
+    return Block("sector", list(sorted(blocklist, key=lambda a: a.identifier)))
 
 
 class Visage(metaclass=ABCMeta):
@@ -15,9 +64,26 @@ class Visage(metaclass=ABCMeta):
     """
 
     @abstractmethod
-    def textmap2ast(self, textmap: Textmap) -> TranslationUnit:
+    def iter_blocks(self, textmap: Textmap) -> Iterator[Node]:
+        """
+        :return: An iterator over the global expressions of the TEXTMAP of @textmap in output order: the namespace
+                 assignment, then the blocks, each made as it is reached.
+        """
         raise NotImplementedError
 
+    def textmap2ast(self, textmap: Textmap) -> TranslationUnit:
+        return TranslationUnit(*self.iter_blocks(textmap))
+
+    def write(self, textmap: Textmap, fileobj: BinaryIO):
+        """
+        Writes str(self.textmap2ast(@textmap)) to @fileobj one global expression at a time, as each is made, without
+        holding all of them or a TranslationUnit.
+        """
+        separator = b""
+        for e in self.iter_blocks(textmap):
+            fileobj.write(separator + str(e).encode(ENCODING))
+            separator = b"\n\n"
+
 
 class SebelinoVisage(Visage):
     """
@@ -38,197 +104,76 @@ class SebelinoVisage(Visage):
     """
 
     @staticmethod
-    def _linedef_orientation(cycle: Cycle):
-        sidefronts = set()
-        sidebacks = set()
-        for _ in range((len(cycle) + 1) // 2):
-            ld1 = next(cycle)
-            ld2 = next(cycle)
-            if ld1.v1 == ld2.v1:  # Tail-tail
-                sidebacks.add(ld1)
-                sidefronts.add(ld2)
-            elif ld1.v1 == ld2.v2:  # Tail-head
-                sidebacks.add(ld1)
-                sidebacks.add(ld2)
-            elif ld1.v2 == ld2.v1:  # Head-tail
-                sidefronts.add(ld1)
-                sidefronts.add(ld2)
-            elif ld1.v2 == ld2.v2:  # Head-head
-                sidefronts.add(ld1)
-                sidebacks.add(ld2)
-        return frozenset(sidefronts), frozenset(sidebacks)
-
-    def textmap2ast(self, textmap: Textmap) -> TranslationUnit:
-        assignments = [
-            Assignment("namespace", textmap.namespace),
-        ]
-
-        global_exprs = assignments + self._add_things(textmap)
+    def _context(textmap: Textmap) -> ExportContext:
+        vertices = sorted(textmap.vertices, key=lambda e: (e.y, e.x))
+        vertex_ids = {v: i for i, v in enumerate(vertices)}
+        linedefs = sorted(textmap.linedefs, key=lambda ld: (vertex_ids[ld.v1], vertex_ids[ld.v2]))
+        return ExportContext(vertices, vertex_ids, linedefs, textmap.cycles(), textmap.sides())
+
+    def iter_blocks(self, textmap: Textmap) -> Iterator[Node]:
+        context = self._context(textmap)
+
+        yield Assignment("namespace", textmap.namespace)
+        yield from self._add_things(textmap)
+        yield from self._add_vertices(context)
+        yield from self._add_linedefs(context)
+        yield from self._add_sidedefs(context)
+        yield from self._add_sectors(textmap, context)
 
-        assert not any(e is None for e in global_exprs)
-
-        return TranslationUnit(*global_exprs)
-
-    def _add_things(self, textmap: Textmap):
+    @staticmethod
+    def _add_things(textmap: Textmap) -> Iterator[Block]:
         # TODO multiplicity
-        things = {
-            t: Block("thing", [
-                Assignment("x", Decimal("{0:.3f}".format(t.x))),
-                Assignment("y", Decimal("{0:.3f}".format(t.y))),
-                Assignment("type", t.type),
-            ]) for t in textmap.things
-        }
-
-        return list(things.values()) + self._add_vertices(textmap)
-
-    def _add_vertices(self, textmap: Textmap):
-        vertices = {
-            v: Block("vertex", [
-                Assignment("x", Decimal("{0:.3f}".format(v.x))),
-                Assignment("y", Decimal("{0:.3f}".format(v.y))),
-            ]) for i, v in enumerate(sorted(textmap.vertices, key=lambda e: (e.y, e.x)))
-        }
-
-        vertex_list = sorted(vertices.items(), key=lambda e: (e[0].y, e[0].x))
-        vertex_list = [b for _, b in vertex_list]
+        for t, x, y in _with_coordinates(list(dict.fromkeys(textmap.things))):
+            yield _thing_block(t, x, y)
 
-        return vertex_list + self._add_linedefs(textmap)
-
-    def _add_linedefs(self, textmap: Textmap):
-        v2id = {v: i for i, v in enumerate(sorted(textmap.vertices, key=lambda e: (e.y, e.x)))}
-
-        # Add v1, v2 indices
-        linedefs = {(v2id[ld.v1], v2id[ld.v2], ld) for ld in textmap.linedefs}
-
-        # Sort by v1, v2 indices
-        linedefs = list(sorted(linedefs, key=lambda e: (e[0], e[1])))
-
-        # To list of dicts
-        linedefs = [(ld, dict(v1=v1, v2=v2)) for v1, v2, ld in linedefs]
-
-        # Add sidefront indices
-        for sdid, (ld, dct) in enumerate(linedefs):
-            dct['sidefront'] = sdid
-
-        # Add sideback indices
-        first_sideback_index = max(dct['sidefront'] for ld, dct in linedefs) + 1
-        sideback_linedefs = ((ld, dct) for ld, dct in linedefs if ld.sideback)
-        for sdid, (ld, dct) in enumerate(sideback_linedefs, first_sideback_index):
-            dct['sideback'] = sdid
-
-        linedefs = {
-            (v2id[ld.v1], v2id[ld.v2], Block("linedef", self._to_block(dct, ld, v2id)))
-            for ld, dct in linedefs
-        }
-
-        linedef_list = [b for _, _, b in sorted(linedefs, key=lambda e: (e[0], e[1]))]
-
-        return linedef_list + self._add_sidedefs(textmap)
-
-    def _add_sidedefs(self, textmap: Textmap):
-        vertices = {v: i for i, v in enumerate(sorted(textmap.vertices, key=lambda e: (e.y, e.x)))}
-
-        linedefs = {(vertices[ld.v1], vertices[ld.v2], ld) for ld in textmap.linedefs}
-
-        linedefs = [ld for sdid, (v1, v2, ld) in
-                    enumerate(sorted(linedefs, key=lambda e: (e[0], e[1])))]
-
-        cycles = textmap.cycles()
-
-        cycles_sides = {self._linedef_orientation(c) for c in cycles}
-
-        sidedefs = self._to_sidedefs(cycles_sides, linedefs)
-
-        return sidedefs + self._add_sectors(textmap)
-
-    def _add_sectors(self, textmap: Textmap):
-        cycle_count = len(textmap.cycles())  # TODO memoization
-
-        sector_list = [Block("sector", self._s2blocklist(s)) for s in textmap.sectors]
-        sector_list *= cycle_count
+    @staticmethod
+    def _add_vertices(context: ExportContext) -> Iterator[Block]:
+        for _, x, y in _with_coordinates(context.vertices):
+            yield _vertex_block(x, y)
+
+    def _add_linedefs(self, context: ExportContext) -> Iterator[Block]:
+        v2id = context.vertex_ids
+
+        # Sidefronts are numbered in linedef order, sidebacks after all of them
+        next_sideback_index = len(context.linedefs)
+        for sdid, ld in enumerate(context.linedefs):
+            dct = dict(v1=v2id[ld.v1], v2=v2id[ld.v2], sidefront=sdid)
+            if ld.sideback:
+                dct['sideback'] = next_sideback_index
+                next_sideback_index += 1
+            yield Block("linedef", self._to_block(dct, ld, v2id))
 
-        return sector_list
+    def _add_sidedefs(self, context: ExportContext) -> Iterator[Block]:
+        return self._to_sidedefs(context.sides, context.linedefs)
 
-    @classmethod
-    def _s2blocklist(cls, s: Sector):
-        blocklist = [
-            Assignment("heightceiling", s.heightceiling),
-            Assignment("texturefloor", s.texturefloor),
-            Assignment("textureceiling", s.textureceiling),
-        ]
-        if s.heightfloor:
-            blocklist.append(Assignment("heightfloor", s.heightfloor))
-        if s.xscalefloor != 1.0:
-            blocklist.append(Assignment("xscalefloor", Decimal("{0:.6f}".format(s.xscalefloor))))
-        if s.yscalefloor != 1.0:
-            blocklist.append(Assignment("yscalefloor", Decimal("{0:.6f}".format(s.yscalefloor))))
-        if s.xscaleceiling != 1.0:
-            blocklist.append(Assignment("xscaleceiling", Decimal("{0:.6f}".format(s.xscaleceiling))))
-        if s.yscaleceiling != 1.0:
-            blocklist.append(Assignment("yscaleceiling", Decimal("{0:.6f}".format(s.yscaleceiling))))
-        return list(sorted(blocklist, key=lambda a: a.identifier))
+    @staticmethod
+    def _add_sectors(textmap: Textmap, context: ExportContext) -> Iterator[Block]:
+        sector_list = [_sector_block(s) for s in textmap.sectors]
+        for _ in range(len(context.faces)):
+            yield from sector_list
 
     @classmethod
-    def _assign_cycle_to_sectorid(cls, linedef_list, cycles) -> Dict[Any, int]:
-        cycle_to_sectorid = dict()
-
-        sector_index = 0
+    def _to_sidedefs(cls, sides: Dict[Linedef, Sides], linedef_list) -> Iterator[Block]:
+        # Sectors are numbered in order of the first linedef they are in front of
+        sector_ids = {}
         for ld in linedef_list:
-            for fcycle, bcycle in cycles:
-                if ld in fcycle:
-                    if (fcycle, bcycle) not in cycle_to_sectorid.keys():
-                        cycle_to_sectorid[(fcycle, bcycle)] = sector_index
-                        sector_index += 1
-                    break
-        return cycle_to_sectorid
-
-    @classmethod
-    def _ld2sdid(cls, linedef_list, cycle_to_sectorid: Dict[Any, int]) -> Tuple[int]:
-        sectorids = []
+            front = sides[ld].front
+            if front is not None and front not in sector_ids:
+                sector_ids[front] = len(sector_ids)
 
         for ld in linedef_list:
-            for (fcycle, _), sid in cycle_to_sectorid.items():
-                if ld in fcycle:
-                    sectorids.append(sid)
-
-        return tuple(sectorids)
-
-    @classmethod
-    def _ld2sdid_back(cls, linedef_list, cycle_to_sectorid: Dict[Any, int]) -> Tuple[int]:
-        sectorids = []
+            if sides[ld].front is not None:
+                yield Block("sidedef", [
+                    Assignment("sector", sector_ids[sides[ld].front]),
+                    Assignment("texturemiddle", "MARBFACE"),
+                ])
 
         for ld in linedef_list:
-            for (_, bcycle), sid in cycle_to_sectorid.items():
-                if ld in bcycle:
-                    sectorids.append(sid)
-
-        return tuple(sectorids)
-
-    @classmethod
-    def _to_sidedefs(cls, cycles_sides, linedef_list):
-        cycle_to_sectorid = cls._assign_cycle_to_sectorid(linedef_list, cycles_sides)
-
-        front_sector_ids = cls._ld2sdid(linedef_list, cycle_to_sectorid)
-
-        sidefronts = [
-            Block("sidedef", [
-                Assignment("sector", sector_id),
-                Assignment("texturemiddle", "MARBFACE"),
-            ])
-            for sector_id in front_sector_ids
-        ]
-
-        back_sector_ids = cls._ld2sdid_back(linedef_list, cycle_to_sectorid)
-
-        sidebacks = [
-            Block("sidedef", [
-                Assignment("sector", sector_id),
-                Assignment("texturemiddle", "MARBFACE"),
-            ])
-            for sector_id in back_sector_ids
-        ]
-
-        return sidefronts + sidebacks
+            if sides[ld].back in sector_ids:
+                yield Block("sidedef", [
+                    Assignment("sector", sector_ids[sides[ld].back]),
+                    Assignment("texturemiddle", "MARBFACE"),
+                ])
 
     @classmethod
     def sd2blocklist(cls, sd: Sidedef, sectors):
@@ -267,3 +212,88 @@ class SebelinoVisage(Visage):
             lists.append(Assignment("sideback", dct["sideback"]))
         lists += [Assignment("blocking", ld.blocking)]
         return lists
+
+
+def _indices(elements: Sequence) -> Callable[[Any], int]:
+    """
+    :return: A function from an element to its index in @elements: that of the element itself, or else that of the
+             first element equal to it.
+    """
+    by_identity = {id(e): i for i, e in enumerate(elements)}
+    by_value = {}
+
+    def index(element) -> int:
+        i = by_identity.get(id(element))
+        if i is not None:
+            return i
+        if not by_value:
+            for i, e in reversed(list(enumerate(elements))):
+                by_value[e] = i
+        return by_value[element]
+
+    return index
+
+
+class IndexPreservingVisage(Visage):
+    """
+    Layout:
+
+    Assignments
+    Things
+    Vertices
+    Linedefs
+    Sidedefs
+    Sectors
+
+    Every kind of map element is written in its original index order, that of Textmap.order where known, and every
+    linedef and sidedef refers to the same elements as before. Nothing is sorted and no sectors are rebuilt from
+    cycles, so export takes linear time. Meant for transformations that leave the topology of a map as it is.
+    """
+
+    def iter_blocks(self, textmap: Textmap) -> Iterator[Node]:
+        order = textmap.order or Order(
+            tuple(textmap.vertices),
+            tuple(textmap.sidedefs),
+            tuple(textmap.linedefs),
+            tuple(textmap.sectors),
+        )
+        vertex_id = _indices(order.vertices)
+        sidedef_id = _indices(order.sidedefs)
+        sector_id = _indices(order.sectors)
+
+        yield Assignment("namespace", textmap.namespace)
+        for t, x, y in _with_coordinates(textmap.things):
+            yield _thing_block(t, x, y)
+        for _, x, y in _with_coordinates(order.vertices):
+            yield _vertex_block(x, y)
+        for ld in order.linedefs:
+            yield self._linedef_block(ld, vertex_id, sidedef_id)
+        for sd in order.sidedefs:
+            yield self._sidedef_block(sd, sector_id)
+        for s in order.sectors:
+            yield _sector_block(s)
+
+    @staticmethod
+    def _linedef_block(ld: Linedef, vertex_id, sidedef_id) -> Block:
+        blocklist = [
+            Assignment("v1", vertex_id(ld.v1)),
+            Assignment("v2", vertex_id(ld.v2)),
+        ]
+        if ld.sidefront is not None:
+            blocklist.append(Assignment("sidefront", sidedef_id(ld.sidefront)))
+        if ld.sideback is not None:
+            blocklist.append(Assignment("sideback", sidedef_id(ld.sideback)))
+        blocklist.append(Assignment("blocking", ld.blocking))
+        return Block("linedef", blocklist)
+
+    @staticmethod
+    def _sidedef_block(sd: Sidedef, sector_id) -> Block:
+        blocklist = [
+            Assignment("sector", sector_id(sd.sector)),
+            Assignment("texturemiddle", sd.texturemiddle),
+        ]
+        if sd.offsetx:
+            blocklist.append(Assignment("offsetx", sd.offsetx))
+        if sd.offsety:
+            blocklist.append(Assignment("offsety", sd.offsety))
+        return Block("sidedef", blocklist)
@@ -1,34 +1,138 @@
 #!/usr/bin/env python3
 
-from pyudmf.model.textmap import Textmap, Thing, Sector, Sidedef, Vertex
+from pyudmf.grammar.fixed import fixed
+from pyudmf.grammar.tu import Assignment, Block, TranslationUnit
+from pyudmf.model.textmap import Linedef, Order, Textmap, Thing, Sector, Sidedef, Vertex
 
 
 def scaled(textmap: Textmap, factor: float) -> Textmap:
-    """ Scales the x and y coordinates of every thing and vertex in the textmap. """
-
-    sectors = {Sector(
-        s.heightfloor,
-        s.heightceiling,
-        s.texturefloor,
-        s.textureceiling,
-        xscalefloor=factor * s.xscalefloor,
-        yscalefloor=factor * s.yscalefloor,
-        xscaleceiling=factor * s.xscaleceiling,
-        yscaleceiling=factor * s.yscaleceiling,
-    ) for s in textmap.sectors}
-    sidedefs = {Sidedef(
-        sd.texturemiddle,
-        factor * sd.offsetx,
-        factor * sd.offsety
-    ) for sd in textmap.sidedefs}
-    vertices = {Vertex(factor * v.x, factor * v.y) for v in textmap.vertices}
-    linedefs = textmap.linedefs
-    things = [Thing(t.type, factor * t.x, factor * t.y) for t in textmap.things]
+    """
+    Scales the x and y coordinates of every thing and vertex in the textmap, and the texture scales and offsets that
+    go with them. Linedefs and sidedefs refer to the scaled counterparts of what they referred to, and the index order
+    of the textmap, if known, is kept.
+    """
+    # Original element -> scaled element, by identity, as elements that compare equal may still differ
+    sectors = {}
+    sidedefs = {}
+    vertices = {}
+    linedefs = {}
+
+    def sector(s: Sector) -> Sector:
+        if id(s) not in sectors:
+            sectors[id(s)] = Sector(
+                s.heightfloor,
+                s.heightceiling,
+                s.texturefloor,
+                s.textureceiling,
+                xscalefloor=factor * s.xscalefloor,
+                yscalefloor=factor * s.yscalefloor,
+                xscaleceiling=factor * s.xscaleceiling,
+                yscaleceiling=factor * s.yscaleceiling,
+            )
+        return sectors[id(s)]
+
+    def sidedef(sd: Sidedef) -> Sidedef:
+        if id(sd) not in sidedefs:
+            sidedefs[id(sd)] = Sidedef(
+                sector(sd.sector),
+                sd.texturemiddle,
+                _offset(factor * sd.offsetx),
+                _offset(factor * sd.offsety),
+            )
+        return sidedefs[id(sd)]
+
+    def vertex(v: Vertex) -> Vertex:
+        if id(v) not in vertices:
+            vertices[id(v)] = Vertex(factor * v.x, factor * v.y)
+        return vertices[id(v)]
+
+    def linedef(ld: Linedef) -> Linedef:
+        if id(ld) not in linedefs:
+            linedefs[id(ld)] = Linedef(
+                vertex(ld.v1),
+                vertex(ld.v2),
+                sidefront=sidedef(ld.sidefront) if ld.sidefront is not None else None,
+                sideback=sidedef(ld.sideback) if ld.sideback is not None else None,
+                blocking=ld.blocking,
+            )
+        return linedefs[id(ld)]
+
+    order = textmap.order
+    if order is not None:
+        order = Order(
+            tuple(map(vertex, order.vertices)),
+            tuple(map(sidedef, order.sidedefs)),
+            tuple(map(linedef, order.linedefs)),
+            tuple(map(sector, order.sectors)),
+        )
 
     return Textmap(
-        vertices=vertices,
-        linedefs=linedefs,
-        sidedefs=sidedefs,
-        sectors=sectors,
-        things=things,
+        namespace=textmap.namespace,
+        vertices=map(vertex, textmap.vertices),
+        linedefs=map(linedef, textmap.linedefs),
+        sidedefs=map(sidedef, textmap.sidedefs),
+        sectors=map(sector, textmap.sectors),
+        things=[Thing(t.type, factor * t.x, factor * t.y) for t in textmap.things],
+        order=order,
     )
+
+
+def _coordinate(value: float) -> str:
+    return fixed(value, 3)
+
+
+def _texture_scale(value: float) -> str:
+    return fixed(value, 6)
+
+
+def _offset(value: float) -> int:
+    return int(round(value))
+
+
+# Block type -> (properties to scale, their default if unset or None to leave them unset, format of scaled values:
+# a fixed-precision token or an int)
+_SCALED_PROPERTIES = {
+    'thing': (('x', 'y'), None, _coordinate),
+    'vertex': (('x', 'y'), None, _coordinate),
+    'sector': (('xscalefloor', 'yscalefloor', 'xscaleceiling', 'yscaleceiling'), 1.0, _texture_scale),
+    'sidedef': (('offsetx', 'offsety'), None, _offset),
+}
+
+
+def _scaled_block(block: Block, factor: float) -> Block:
+    if block.identifier not in _SCALED_PROPERTIES:
+        return block
+    keys, default, fmt = _SCALED_PROPERTIES[block.identifier]
+    props = dict(block.items())
+    for k in keys:
+        value = props.get(k, default)
+        if value is None:
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            # A mistyped token that is not a number is kept as it is, like the parser keeps it
+            continue
+        scaled_value = fmt(factor * number)
+        if isinstance(scaled_value, str):
+            # Compared as floats, so no Decimal is made; a value equal to its scaled token keeps its source text
+            if float(scaled_value) != number:
+                block = block.with_assignment(Assignment.number(k, scaled_value))
+        elif scaled_value != value:
+            block = block.with_value(k, scaled_value)
+    return block
+
+
+def scaled_tu(tu: TranslationUnit, factor: float) -> TranslationUnit:
+    """
+    Scales the same properties as scaled does, but edits the TranslationUnit directly instead of converting it to a
+    Textmap and back. Properties the model does not know are kept, and blocks whose values do not change are kept as
+    they are, so a source-preserving @tu is written out unchanged wherever the scaling leaves it so.
+    """
+    replaced = dict()
+    for i, global_expr in enumerate(tu):
+        if isinstance(global_expr, Block):
+            block = _scaled_block(global_expr, factor)
+            if block is not global_expr:
+                replaced[i] = block
+    return tu.with_exprs(replaced)
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
+from decimal import Decimal
+
 import pytest
 
+from pyudmf.model.factory import ast2textmap
 from pyudmf.model.textmap import Textmap, Vertex, Thing
-from pyudmf.ops.scaler import scaled
+from pyudmf.ops.scaler import scaled, scaled_tu
+from pyudmf.parser import parse_udmf
 
 
 @pytest.mark.parametrize("textmap, expected", [
@@ -14,3 +18,55 @@ from pyudmf.ops.scaler import scaled
 def test_scaled(textmap, expected):
     returned = scaled(textmap, 0.5)
     assert returned == expected
+
+
+def test_scaled_references():
+    tu = parse_udmf("""
+        vertex { x = 0.0; y = 0.0; }
+        vertex { x = 0.0; y = 64.0; }
+        linedef { v1 = 1; v2 = 0; sidefront = 0; }
+        sidedef { sector = 0; texturemiddle = "STONE2"; offsetx = 8; }
+        sector { heightceiling = 128; texturefloor = "FLAT1"; textureceiling = "FLAT1"; }
+    """, backend="scanner")
+    textmap = ast2textmap(tu)
+
+    returned = scaled(textmap, 0.5)
+
+    linedef, = returned.order.linedefs
+    assert returned.order.vertices == (Vertex(0.0, 0.0), Vertex(0.0, 32.0))
+    assert linedef.v1 is returned.order.vertices[1]
+    assert linedef.v2 is returned.order.vertices[0]
+    assert linedef.sidefront is returned.order.sidedefs[0]
+    assert linedef.sidefront.offsetx == 4
+    assert linedef.sidefront.sector is returned.order.sectors[0]
+    assert linedef.sidefront.sector.xscalefloor == 0.5
+    assert returned.linedefs == {linedef}
+
+
+@pytest.mark.parametrize("textmap, expected", [
+    ('', ''),
+    ('vertex { x = 10.0; y = 16.0; }', 'vertex\n{\nx = 5.000;\ny = 8.000;\n}'),
+    ('thing { type = 1; x = 20.0; y = 7.0; }', 'thing\n{\ntype = 1;\nx = 10.000;\ny = 3.500;\n}'),
+    ('thing { type = 1; x = 0.0; y = 0.0; }', 'thing { type = 1; x = 0.0; y = 0.0; }'),
+    ('sidedef { sector = 0; offsetx = 7; }', 'sidedef\n{\nsector = 0;\noffsetx = 4;\n}'),
+    ('sector { xscalefloor = 2.0; }', 'sector\n{\nxscalefloor = 1.000000;\nyscalefloor = 0.500000;\n'
+                                      'xscaleceiling = 0.500000;\nyscaleceiling = 0.500000;\n}'),
+    ('linedef { v1 = 0; v2 = 1; user_x = 3.0; }', 'linedef { v1 = 0; v2 = 1; user_x = 3.0; }'),
+    ('vertex { x = "west"; y = 16.0; }', 'vertex\n{\nx = "west";\ny = 8.000;\n}'),
+    ('sidedef { sector = 0; offsetx = true; }', 'sidedef { sector = 0; offsetx = true; }'),
+])
+def test_scaled_tu(textmap, expected):
+    tu = parse_udmf(textmap, backend="scanner", preserve_source=True)
+    assert str(scaled_tu(tu, 0.5)) == expected
+    assert str(scaled_tu(tu, 1)) == textmap
+
+
+def test_scaled_tu_tokens():
+    tu = parse_udmf('vertex { x = 10.0; y = nan; } sector { xscalefloor = 1.0; }', backend="scanner")
+
+    vertex, sector = scaled_tu(tu, 1 / 3)
+
+    x, y = vertex.expressions
+    assert x.token == '3.333' and x.value == Decimal('3.333')
+    assert y.token is None and y.value.is_nan()
+    assert [a.token for a in sector.expressions] == ['0.333333', '0.333333', '0.333333', '0.333333']
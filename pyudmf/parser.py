@@ -1,11 +1,38 @@
 #!/usr/bin/env python
 
+from functools import lru_cache
+
 from pyparsing import Word, alphas, alphanums, Literal, Combine, Optional, nums, QuotedString, ZeroOrMore
 
 from pyudmf.grammar.tu import Assignment, Block, TranslationUnit
+from pyudmf.scanner import scan_udmf, parse_udmf_iter, parse_udmf_buffer, parse_udmf_mmap, \
+    parse_udmf_parallel
+
+BACKENDS = ("pyparsing", "scanner")
+
 
+@lru_cache(maxsize=None)
+def _translation_unit():
+    """ :return: The pyparsing grammar for a TEXTMAP lump, built once and shared between calls. """
+    _plusorminus = Literal('+') | Literal('-')
+    identifier = Word(alphas + '_', alphanums + '_')
+    _uinteger = Word(nums)
+    # TODO hexadecimal, octal integers
+    _integer = Combine(Optional(_plusorminus) + _uinteger)
+    _float = Combine(_integer + Optional(Literal('.') + Optional(_uinteger)))
+    keyword = Word(alphas)  # [^{}();"'\n\t ]+
+    value = _float | QuotedString('"') | keyword
+
+    assignment_expr = Assignment.group(identifier + '=' + value + ';')
+    expr_list = ZeroOrMore(assignment_expr)
+    block = Block.group(identifier + '{' + expr_list + '}')
+    global_expr = block | assignment_expr
+    global_expr_list = ZeroOrMore(global_expr)
+    return TranslationUnit.group(global_expr_list)
 
-def parse_udmf(textmap_string: str):
+
+def parse_udmf(textmap_string: str, backend: str = "pyparsing", lazy: bool = False, packed: bool = False,
+               preserve_source: bool = False):
     """
     translation_unit := global_expr_list
     global_expr_list := global_expr global_expr_list
@@ -21,23 +48,21 @@ def parse_udmf(textmap_string: str):
     keyword := [^{}();"'\n\t ]+
 
     :param textmap_string:
+    :param backend: "pyparsing" for the reference implementation, or "scanner" for the hand-written single-pass
+                    parser in pyudmf.scanner, which is considerably faster on large lumps.
+    :param lazy: Whether to cast each value on first access instead of while parsing, see scan_udmf. Only the
+                 scanner backend supports this.
+    :param packed: Whether Blocks should hold their assignments as parallel tuples, see scan_udmf. Only the scanner
+                   backend supports this.
+    :param preserve_source: Whether to serialize untouched global expressions exactly as written in @textmap_string,
+                            see scan_udmf. Only the scanner backend supports this.
     :return: pyparsing instance parsed from @textmap_string
     """
-    _plusorminus = Literal('+') | Literal('-')
-    identifier = Word(alphas + '_', alphanums + '_')
-    _uinteger = Word(nums)
-    # TODO hexadecimal, octal integers
-    _integer = Combine(Optional(_plusorminus) + _uinteger)
-    _float = Combine(_integer + Optional(Literal('.') + Optional(_uinteger)))
-    keyword = Word(alphas)  # [^{}();"'\n\t ]+
-    value = _float | QuotedString('"') | keyword
-
-    assignment_expr = Assignment.group(identifier + '=' + value + ';')
-    expr_list = ZeroOrMore(assignment_expr)
-    block = Block.group(identifier + '{' + expr_list + '}')
-    global_expr = block | assignment_expr
-    global_expr_list = ZeroOrMore(global_expr)
-    translation_unit = TranslationUnit.group(global_expr_list)
-
-    ast = translation_unit.parseString(textmap_string)[0]
+    if backend == "scanner":
+        return scan_udmf(textmap_string, lazy, packed, preserve_source)
+    if backend != "pyparsing":
+        raise ValueError("Unknown backend: {}".format(backend))
+    if lazy or packed or preserve_source:
+        raise ValueError("Lazy casting, packed blocks and source preservation require the scanner backend")
+    ast = _translation_unit().parseString(textmap_string)[0]
     return ast
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+
+import mmap
+import os
+from bisect import bisect_left, bisect_right
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from pyudmf.grammar.schema import GLOBAL_CONVERTERS
+from pyudmf.grammar.tu import Assignment, Block, Node, TranslationUnit
+
+_WS = r'[ \t\r\n]*'
+_IDENTIFIER = r'[A-Za-z_][A-Za-z0-9_]*'
+_VALUE = r'(?:[+-]?[0-9]+(?:\.[0-9]*)?|"([^"\n\r]*)"|[A-Za-z]+)'
+
+# Groups: identifier, value token, unquoted string (None unless the token is a quoted string)
+_ASSIGNMENT = r'{ws}({id}){ws}={ws}({value}){ws};'.format(ws=_WS, id=_IDENTIFIER, value=_VALUE)
+_BLOCK_OPEN = r'{ws}({id}){ws}\{{'.format(ws=_WS, id=_IDENTIFIER)
+_BLOCK_CLOSE = r'{ws}\}}'.format(ws=_WS)
+_TRAILING = _WS + r'\Z'
+
+CHUNK_SIZE = 1 << 16
+CHUNKS_PER_WORKER = 4
+
+
+class _UnexpectedInput(ValueError):
+    """ Raised for input at @offset that is not a global expression. Pickles, so it can leave a worker process. """
+
+    def __init__(self, offset: int):
+        super().__init__(offset)
+        self.offset = offset
+
+    def __str__(self):
+        return "Unexpected input at offset {}".format(self.offset)
+
+
+class _Scanner(object):
+    """
+    Single-pass recursive-descent parser accepting the same grammar as the pyparsing reference implementation in
+    pyudmf.parser. Subclasses decide how matched identifiers and values become nodes.
+    """
+
+    assignment_re = re.compile(_ASSIGNMENT)
+    block_open_re = re.compile(_BLOCK_OPEN)
+    block_close_re = re.compile(_BLOCK_CLOSE)
+    trailing_re = re.compile(_TRAILING)
+
+    def assignment(self, match) -> Assignment:
+        identifier, token, string = match.groups()
+        value = token if string is None else Assignment._unquote(string)
+        converter = GLOBAL_CONVERTERS.get(identifier)
+        return Assignment(identifier, value if converter is None else converter(value))
+
+    def member(self, match):
+        """ :return: What the Block under construction holds for the assignment @match. """
+        return self.assignment(match)
+
+    def block(self, identifier: str, members: List) -> Block:
+        return Block(identifier, members)
+
+    def identifier(self, match) -> str:
+        return match.group(1)
+
+    def global_expr(self, text, pos: int, endpos: int = sys.maxsize):
+        """
+        :return: A (node, end) pair for the global expression starting at @pos, or None if no complete global
+                 expression starts there and ends before @endpos.
+        """
+        assignment_match = self.assignment_re.match
+        match = assignment_match(text, pos, endpos)
+        if match:
+            return self.assignment(match), match.end()
+        match = self.block_open_re.match(text, pos, endpos)
+        if not match:
+            return None
+        identifier = self.identifier(match)
+        pos = match.end()
+        member = self.member
+        members = []
+        while True:
+            match = assignment_match(text, pos, endpos)
+            if not match:
+                break
+            members.append(member(match))
+            pos = match.end()
+        match = self.block_close_re.match(text, pos, endpos)
+        if not match:
+            return None
+        return self.block(identifier, members), match.end()
+
+    def translation_unit(self, text, pos: int = 0, endpos: int = sys.maxsize,
+                         preserve_source: bool = False) -> TranslationUnit:
+        """
+        :param preserve_source: Whether the TranslationUnit should keep @text as its source, see TranslationUnit.
+        :return: The TranslationUnit of @text between @pos and @endpos, with the span of every global expression.
+        :raise ValueError: If that part of @text is not a sequence of whole global expressions.
+        """
+        global_exprs = []
+        spans = []
+        while True:
+            scanned = self.global_expr(text, pos, endpos)
+            if scanned is None:
+                break
+            node, end = scanned
+            global_exprs.append(node)
+            spans.append((pos, end))
+            pos = end
+        if not self.trailing_re.match(text, pos, endpos):
+            raise _UnexpectedInput(pos)
+        return TranslationUnit(*global_exprs, spans=tuple(spans), source=text if preserve_source else None)
+
+
+class _LazyScanner(_Scanner):
+    """
+    Keeps each value as its source token and leaves casting to the first access of the Assignment's value.
+    """
+
+    def assignment(self, match) -> Assignment:
+        return Assignment.deferred(match.group(1), match.group(2))
+
+
+class _PackedScanner(_Scanner):
+    """
+    Builds Blocks that hold their assignments as parallel tuples of identifiers and values, see Block.packed.
+    """
+
+    def member(self, match):
+        identifier, token, string = match.groups()
+        value = token if string is None else Assignment._unquote(string)
+        converter = GLOBAL_CONVERTERS.get(identifier)
+        return identifier, value if converter is None else converter(value)
+
+    def block(self, identifier: str, members: List) -> Block:
+        keys, values = zip(*members) if members else ((), ())
+        return Block.packed(identifier, keys, values)
+
+
+class _BufferScanner(_Scanner):
+    """
+    Scans a bytes-like object in place. Each value is kept as a memoryview into the buffer and only decoded when the
+    Assignment's value is first accessed. Identifiers come from a small vocabulary, so each distinct one is decoded
+    once and shared between all nodes.
+    """
+
+    assignment_re = re.compile(_ASSIGNMENT.encode())
+    block_open_re = re.compile(_BLOCK_OPEN.encode())
+    block_close_re = re.compile(_BLOCK_CLOSE.encode())
+    trailing_re = re.compile(_TRAILING.encode())
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        self._identifiers = dict()
+
+    def assignment(self, match) -> Assignment:
+        start, end = match.span(2)
+        return Assignment.deferred(self.identifier(match), self._view[start:end])
+
+    def identifier(self, match) -> str:
+        key = match.group(1)
+        identifier = self._identifiers.get(key)
+        if identifier is None:
+            identifier = self._identifiers[key] = sys.intern(key.decode('ascii'))
+        return identifier
+
+
+def _scanner(lazy: bool, packed: bool = False) -> _Scanner:
+    if lazy and packed:
+        raise ValueError("Packed blocks hold cast values and cannot be lazy")
+    if packed:
+        return _PackedScanner()
+    return _LazyScanner() if lazy else _Scanner()
+
+
+def scan_udmf(textmap_string: str, lazy: bool = False, packed: bool = False,
+              preserve_source: bool = False) -> TranslationUnit:
+    """
+    :param textmap_string:
+    :param lazy: Whether to defer casting each value until it is first accessed. Values that are never assigned are
+                 serialized exactly as they appear in @textmap_string.
+    :param packed: Whether Blocks should hold their assignments as parallel tuples instead of Assignment nodes,
+                   which takes considerably less memory. See Block.packed.
+    :param preserve_source: Whether the TranslationUnit should keep @textmap_string and serialize every global
+                            expression that is not replaced exactly as written there.
+    :return: A TranslationUnit equal to the one parse_udmf(@textmap_string, backend="pyparsing") returns.
+    :raise ValueError: If @textmap_string is not a well-formed TEXTMAP.
+    """
+    return _scanner(lazy, packed).translation_unit(textmap_string, preserve_source=preserve_source)
+
+
+def parse_udmf_iter(fileobj: TextIO, chunk_size: int = CHUNK_SIZE, lazy: bool = False) -> Iterator[Node]:
+    """
+    Parses a TEXTMAP lump incrementally from @fileobj, which is read @chunk_size characters at a time. Only the
+    unconsumed tail of the input is buffered, so memory use is bounded by the largest global expression rather than
+    by the size of the lump.
+
+    :param lazy: See scan_udmf.
+    :return: An iterator over the global expressions (Assignments and Blocks) of the lump, in order.
+    :raise ValueError: If the lump is not a well-formed TEXTMAP.
+    """
+    scanner = _scanner(lazy)
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        scanned = scanner.global_expr(buffer, pos)
+        if scanned is not None:
+            node, pos = scanned
+            yield node
+            continue
+        if eof:
+            break
+        # The partial global expression at pos cannot be complete before a character that may end it arrives, so
+        # chunks are only collected until then instead of scanning it again after each one
+        terminators = '}' if scanner.block_open_re.match(buffer, pos) else ';}'
+        pending = [buffer[pos:]]
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                eof = True
+                break
+            pending.append(chunk)
+            if any(t in chunk for t in terminators):
+                break
+        buffer = ''.join(pending)
+        pos = 0
+    if not scanner.trailing_re.match(buffer, pos):
+        raise ValueError("Unexpected input: {!r}".format(buffer[pos:pos + 40]))
+
+
+def parse_udmf_buffer(buffer, preserve_source: bool = False) -> TranslationUnit:
+    """
+    :param buffer: A bytes-like object holding an encoded TEXTMAP lump, e.g. bytes, a memoryview or an mmap.
+    :param preserve_source: See scan_udmf. Global expressions that are not replaced are written straight from @buffer.
+    :return: A TranslationUnit whose values are memoryview slices of @buffer until they are accessed.
+    :raise ValueError: If @buffer is not a well-formed TEXTMAP.
+    """
+    return _BufferScanner(buffer).translation_unit(buffer, preserve_source=preserve_source)
+
+
+def parse_udmf_mmap(path: str, preserve_source: bool = False) -> TranslationUnit:
+    """
+    Memory-maps the TEXTMAP lump at @path and parses it without reading, decoding or copying the file. The mapping
+    stays open for as long as any Assignment still holds an undecoded value, or the TranslationUnit if it preserves
+    its source.
+    """
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            return TranslationUnit()
+    return parse_udmf_buffer(buffer, preserve_source)
+
+
+def _block_end(text: str, pos: int, in_string: bool) -> Optional[int]:
+    """
+    :param in_string: Whether @pos lies within a quoted string.
+    :return: The offset just past the first '}' at or after @pos that is not part of a quoted string, or None if
+             there is no such '}'. Blocks do not nest, so any such offset lies between two global expressions.
+    """
+    while True:
+        close = text.find('}', pos)
+        if close < 0:
+            return None
+        if not (in_string + text.count('"', pos, close)) % 2:
+            return close + 1
+        end_quote = text.find('"', close)
+        if end_quote < 0:
+            return None
+        pos = end_quote + 1
+        in_string = False
+
+
+def _split(text: str, parts: int) -> List[str]:
+    """ :return: Up to @parts consecutive chunks of @text, each consisting of whole global expressions. """
+    bounds = [0]
+    in_string = False
+    for i in range(1, parts):
+        pos = max(len(text) * i // parts, bounds[-1])
+        in_string = bool((in_string + text.count('"', bounds[-1], pos)) % 2)
+        end = _block_end(text, pos, in_string)
+        if end is None:
+            break
+        in_string = False
+        bounds.append(end)
+    bounds.append(len(text))
+    return [text[start:end] for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def _scan_chunk(chunk: str, lazy: bool, start: int):
+    """ :raise ValueError: If @chunk, found at offset @start of the whole TEXTMAP, holds unexpected input there. """
+    try:
+        return scan_udmf(chunk, lazy).global_expr_list
+    except _UnexpectedInput as e:
+        raise _UnexpectedInput(start + e.offset) from None
+
+
+def parse_udmf_parallel(textmap_string: str, workers: Optional[int] = None, lazy: bool = False) -> TranslationUnit:
+    """
+    Splits @textmap_string between top-level blocks and parses the chunks in a pool of @workers processes, one per
+    CPU by default.
+
+    :param lazy: See scan_udmf.
+    :return: A TranslationUnit equal to the one scan_udmf(@textmap_string, @lazy) returns.
+    :raise ValueError: If @textmap_string is not a well-formed TEXTMAP.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = _split(textmap_string, workers * CHUNKS_PER_WORKER)
+    if workers == 1 or len(chunks) <= 1:
+        return scan_udmf(textmap_string, lazy)
+    global_exprs = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        starts = list(accumulate([0] + [len(chunk) for chunk in chunks[:-1]]))
+        for exprs in executor.map(_scan_chunk, chunks, [lazy] * len(chunks), starts):
+            global_exprs.extend(exprs)
+    return TranslationUnit(*global_exprs)
+
+
+def _dirty_regions(spans, edits):
+    """
+    :return: For each maximal run of global expressions touched by @edits, a list [start, end, first, last, delta]:
+             the offsets of the run in the old source, the indices of its first and one-past-last nodes, and the
+             change in length the edits make to it.
+    """
+    starts = [start for start, _ in spans]
+    ends = [end for _, end in spans]
+    regions = []
+    for start, end, length in sorted(edits):
+        first = bisect_left(ends, start)  # Nodes ending where an edit starts are touched, too
+        last = bisect_right(starts, end)
+        region = [
+            min(start, spans[first][0]) if first < last else start,
+            max(end, spans[last - 1][1]) if first < last else end,
+            first,
+            last,
+            length - (end - start),
+        ]
+        if regions and region[0] <= regions[-1][1]:
+            previous = regions[-1]
+            previous[1] = max(previous[1], region[1])
+            previous[3] = max(previous[3], region[3])
+            previous[4] += region[4]
+        else:
+            regions.append(region)
+    return regions
+
+
+def update_udmf(tu: TranslationUnit, text: str, edits: Iterable[Tuple[int, int, int]],
+                lazy: bool = False) -> TranslationUnit:
+    """
+    Implements TranslationUnit.update: only the runs of global expressions that @edits touch are parsed again, and
+    the spans of the nodes after them are shifted. Falls back to parsing all of @text if @tu has no spans, has been
+    modified since it was parsed, or an edit changes where global expressions begin or end. A source-preserving @tu
+    gives a TranslationUnit that preserves @text.
+    """
+    scanner = _scanner(lazy)
+    preserve_source = tu.source is not None
+    if tu.spans is None or tu.modified():
+        return scanner.translation_unit(text, preserve_source=preserve_source)
+    global_exprs = []
+    spans = []
+    done = 0
+    delta = 0
+    for start, end, first, last, region_delta in _dirty_regions(tu.spans, edits):
+        global_exprs.extend(tu.global_expr_list[done:first])
+        spans.extend((s + delta, e + delta) for s, e in tu.spans[done:first])
+        try:
+            region = scanner.translation_unit(text, start + delta, end + delta + region_delta)
+        except ValueError:
+            return scanner.translation_unit(text, preserve_source=preserve_source)
+        global_exprs.extend(region.global_expr_list)
+        spans.extend(region.spans)
+        done = last
+        delta += region_delta
+    global_exprs.extend(tu.global_expr_list[done:])
+    spans.extend((s + delta, e + delta) for s, e in tu.spans[done:])
+    return TranslationUnit(*global_exprs, spans=tuple(spans), source=text if preserve_source else None)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import io
+from decimal import Decimal
+import os
+
+import pytest
+
+from pyudmf import cache
+from pyudmf.cache import TextmapCache, dump_textmap, load_textmap
+from pyudmf.model.factory import ast2textmap
+from pyudmf.model.textmap import Textmap, Sector
+from pyudmf.model.visage import IndexPreservingVisage
+from pyudmf.parser import parse_udmf
+
+_textmap = b"""namespace = "zdoom";
+thing { x = 32.000; y = 32.000; type = 1; }
+vertex { x = 0.000; y = 0.000; }
+vertex { x = 64.000; y = 0.000; }
+vertex { x = 0.000; y = 64.000; }
+linedef { v1 = 0; v2 = 2; sidefront = 0; blocking = true; }
+linedef { v1 = 1; v2 = 0; sidefront = 0; sideback = 1; }
+linedef { v1 = 2; v2 = 1; sidefront = 1; blocking = true; }
+sidedef { sector = 0; texturemiddle = "MARBFACE"; offsetx = 16; }
+sidedef { sector = 1; texturemiddle = "STONE2"; }
+sector { heightceiling = 128; texturefloor = "CEIL3_3"; textureceiling = "CEIL3_3"; xscalefloor = 0.5; }
+sector { heightfloor = 8; heightceiling = 96; texturefloor = "FLOOR6_2"; textureceiling = "CEIL3_5"; }
+"""
+
+
+@pytest.fixture
+def textmap():
+    return ast2textmap(parse_udmf(_textmap.decode()))
+
+
+def test_dump_load(textmap):
+    f = io.BytesIO()
+    dump_textmap(textmap, f)
+    f.seek(0)
+    returned = load_textmap(f)
+    assert returned == textmap
+    assert {(sd.offsetx, sd.offsety) for sd in returned.sidedefs} == {(16, 0), (0, 0)}
+    assert {s.xscalefloor for s in returned.sectors} == {0.5, 1.0}
+
+
+def test_dump_load_preserves_order(tmp_path):
+    # Sidedefs that differ only in offsets, and sectors only in floor height, compare equal
+    data = b"""namespace = "zdoom";
+vertex { x = 64.0; y = 0.0; }
+vertex { x = 0.0; y = 0.0; }
+vertex { x = 0.0; y = 64.0; }
+linedef { v1 = 2; v2 = 0; sidefront = 1; }
+linedef { v1 = 0; v2 = 1; sidefront = 1; }
+linedef { v1 = 1; v2 = 2; sidefront = 0; }
+sidedef { sector = 1; texturemiddle = "STONE2"; offsetx = 8; }
+sidedef { sector = 1; texturemiddle = "STONE2"; }
+sector { heightceiling = 128; texturefloor = "FLAT1"; textureceiling = "FLAT1"; }
+sector { heightfloor = 16; heightceiling = 128; texturefloor = "FLAT1"; textureceiling = "FLAT1"; }
+"""
+    textmap_cache = TextmapCache(str(tmp_path))
+    missed = textmap_cache.load(data)
+    hit = textmap_cache.load(data)
+
+    assert textmap_cache.get(data) is not None
+    assert hit.order is not None
+    assert str(IndexPreservingVisage().textmap2ast(hit)) == str(IndexPreservingVisage().textmap2ast(missed))
+
+
+def test_dump_load_heights():
+    textmap = Textmap(sectors={Sector(Decimal('8'), 96.0, "FLOOR6_2", "CEIL3_5")})
+    f = io.BytesIO()
+    dump_textmap(textmap, f)
+    f.seek(0)
+    sector, = load_textmap(f).sectors
+    assert (sector.heightfloor, sector.heightceiling) == (8, 96)
+
+
+def test_load(tmp_path, textmap, monkeypatch):
+    textmap_cache = TextmapCache(str(tmp_path))
+    assert textmap_cache.get(_textmap) is None
+    assert textmap_cache.load(_textmap) == textmap
+
+    def fail(data):
+        raise AssertionError("Cache hit expected")
+
+    monkeypatch.setattr(cache, 'parse_udmf_buffer', fail)
+    assert textmap_cache.load(_textmap) == textmap
+
+
+def test_key_depends_on_version(monkeypatch):
+    key = TextmapCache.key(_textmap)
+    monkeypatch.setattr('pyudmf.__version__', 'other')
+    assert TextmapCache.key(_textmap) != key
+
+
+def test_evict(tmp_path, textmap):
+    textmap_cache = TextmapCache(str(tmp_path))
+    textmap_cache.put(b'a', textmap)
+    size = os.path.getsize(os.path.join(str(tmp_path), TextmapCache.key(b'a')))
+    textmap_cache.max_bytes = 2 * size
+    os.utime(os.path.join(str(tmp_path), TextmapCache.key(b'a')), (0, 0))
+    textmap_cache.put(b'b', textmap)
+    textmap_cache.put(b'c', textmap)
+    assert textmap_cache.get(b'a') is None
+    assert textmap_cache.get(b'b') == textmap
+    assert textmap_cache.get(b'c') == textmap
+
+
+@pytest.mark.parametrize('size', [0, 4, 64])
+def test_get_corrupt(tmp_path, textmap, size):
+    textmap_cache = TextmapCache(str(tmp_path))
+    textmap_cache.put(_textmap, textmap)
+    path = os.path.join(str(tmp_path), TextmapCache.key(_textmap))
+    with open(path, 'r+b') as f:
+        f.truncate(size)
+
+    assert textmap_cache.get(_textmap) is None
+    assert not os.path.exists(path)
+    assert textmap_cache.load(_textmap) == textmap
+
+
+def test_put_failure(tmp_path, textmap, monkeypatch):
+    def fail(textmap, f):
+        raise MemoryError
+
+    monkeypatch.setattr(cache, 'dump_textmap', fail)
+    with pytest.raises(MemoryError):
+        TextmapCache(str(tmp_path)).put(_textmap, textmap)
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import os
+
+import pytest
+
+from pyudmf.cli import output, scaled_ast, transformed_textmaps
+from pyudmf.model.factory import UnsupportedNamespace, ast2textmap
+from pyudmf.parser import parse_udmf, parse_udmf_buffer
+from pyudmf.wad import Lump, Wad, write_wad
+
+
+def test_output(tmp_path):
+    path = os.path.join(str(tmp_path), 'TEXTMAP')
+    with open(path, 'wb') as f:
+        f.write(b'old')
+
+    with pytest.raises(ValueError):
+        with output(path) as f:
+            f.write(b'partial')
+            raise ValueError
+    with open(path, 'rb') as f:
+        assert f.read() == b'old'
+    assert os.listdir(str(tmp_path)) == ['TEXTMAP']
+
+    with output(path) as f:
+        f.write(b'new')
+    with open(path, 'rb') as f:
+        assert f.read() == b'new'
+    assert os.listdir(str(tmp_path)) == ['TEXTMAP']
+
+
+def test_unsupported_namespace():
+    with pytest.raises(UnsupportedNamespace, match="'doom'"):
+        ast2textmap(parse_udmf('namespace = "doom";'))
+
+
+def test_transformed_textmaps(tmp_path, capsys):
+    path = os.path.join(str(tmp_path), 'maps.wad')
+    with open(path, 'wb') as f:
+        write_wad(f, [
+            Lump('MAP01', b''),
+            Lump('TEXTMAP', b'namespace = "zdoom";\nvertex { x = 2.0; y = 4.0; }'),
+            Lump('ENDMAP', b''),
+            Lump('MAP02', b''),
+            Lump('TEXTMAP', b'namespace = "doom";\nvertex { x = 2.0; y = 4.0; }'),
+            Lump('ENDMAP', b''),
+        ])
+    wad = Wad(path)
+
+    lumps = transformed_textmaps(wad, lambda data: scaled_ast(parse_udmf_buffer(data), 0.5))
+
+    assert b'x = 1.000;' in bytes(lumps[1].data)
+    assert lumps[4].data is wad.lumps[4].data
+    assert capsys.readouterr().err == ("Skipping MAP02: Unsupported namespace 'doom': only zdoom maps can be laid out"
+                                       " anew, scale them with --preserve instead\n")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pyudmf.columns import parse_udmf_columns  # noqa: E402
+
+_textmap = """namespace = "zdoom";
+thing { x = 608.000; y = 256.000; type = 3001; angle = 90; ambush = true; }
+vertex { x = 0.000; y = 0.000; }
+vertex { x = 64.500; y = -8; }
+linedef { v1 = 0; v2 = 1; sidefront = 0; blocking = true; dontpegtop = true; }
+linedef { v1 = 1; v2 = 0; sidefront = 1; sideback = 0; twosided = true; comment = "}"; }
+sidedef { sector = 0; texturemiddle = "MARBFACE"; offsetx = 16; }
+sector { heightceiling = 128; texturefloor = "CEIL3_3"; textureceiling = "CEIL3_3"; }
+"""
+
+
+def test_parse_udmf_columns():
+    columns = parse_udmf_columns(_textmap)
+    assert columns['vertex'].tolist() == [(0.0, 0.0), (64.5, -8.0)]
+    assert columns['linedef'].tolist() == [(0, 1, 0, -1, 0x9), (1, 0, 1, 0, 0x4)]
+    assert columns['sidedef'].tolist() == [(0, 'MARBFACE', 16, 0)]
+    assert columns['sector'].tolist() == [(0, 128, 'CEIL3_3', 'CEIL3_3', 160, 1.0, 1.0, 1.0, 1.0)]
+    assert columns['thing'].tolist() == [(3001, 608.0, 256.0, 90)]
+
+
+def test_parse_udmf_columns_empty():
+    columns = parse_udmf_columns('')
+    assert all(len(column) == 0 for column in columns.values())
+
+
+@pytest.mark.parametrize("textmap", [
+    'vertex { x = ; }',
+    'vertex { x = 1; y = 2; } garbage',
+])
+def test_parse_udmf_columns_malformed(textmap):
+    with pytest.raises(ValueError):
+        parse_udmf_columns(textmap)
+
+
+def test_parse_udmf_columns_float_tokens():
+    columns = parse_udmf_columns('sector { heightfloor = 0.0; heightceiling = 128.9; texturefloor = "F"; '
+                                 'textureceiling = "C"; } thing { type = 1; x = 0; y = 0; angle = 90.5; }')
+    assert columns['sector'][['heightfloor', 'heightceiling']].tolist() == [(0, 128)]
+    assert columns['thing']['angle'].tolist() == [90]
+
+
+@pytest.mark.parametrize("textmap, message", [
+    ('vertex { x = 0; y = 0; }\nthing { type = 1; x = 0; y = 0; angle = east; }', "thing block at offset 24"),
+    ('vertex { x = 0; y = 0; }\nvertex { x = 0; y = north; }', "vertex block at offset 24"),
+])
+def test_parse_udmf_columns_invalid(textmap, message):
+    with pytest.raises(ValueError, match=message):
+        parse_udmf_columns(textmap)
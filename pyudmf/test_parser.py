@@ -1,4 +1,7 @@
 #!/usr/bin/env python
+import io
+import pickle
+from copy import deepcopy
 from decimal import Decimal
 
 import pytest
@@ -61,6 +64,11 @@ from pyudmf.parser import parse_udmf, TranslationUnit, Assignment, Block
      TranslationUnit(Block('sector', [Assignment('xscaleceiling', Decimal('3.000000'))]))),
     ('sector { yscaleceiling = 3.000000; }',
      TranslationUnit(Block('sector', [Assignment('yscaleceiling', Decimal('3.000000'))]))),
+    ('sector { xpanningfloor = 1.500; }',
+     TranslationUnit(Block('sector', [Assignment('xpanningfloor', Decimal('1.500'))]))),
+    ('sector { lightfloor = 16; }', TranslationUnit(Block('sector', [Assignment('lightfloor', 16)]))),
+    ('linedef { blockmonsters = true; }', TranslationUnit(Block('linedef', [Assignment('blockmonsters', True)]))),
+    ('linedef { arg0str = "12"; }', TranslationUnit(Block('linedef', [Assignment('arg0str', "12")]))),
     ("""
 thing
 {
@@ -128,3 +136,80 @@ def test_str(ast, expected):
 ])
 def test_bijection(textmap):
     assert str(parse_udmf(textmap)) == textmap
+
+
+@pytest.mark.parametrize("a, b, equal", [
+    (Assignment('x', Decimal('1.0')), Assignment('x', Decimal('1.00')), True),
+    (Assignment('x', 1), Assignment('x', True), False),
+    (Assignment('x', 1), Assignment('y', 1), False),
+    (Block('thing', [Assignment('x', 1)]), Block('thing', [Assignment('x', 1)]), True),
+    (Block('thing', [Assignment('x', 1)]), Block.packed('thing', ('x',), (1,)), True),
+    (Block('thing', [Assignment('x', 1)]), Block('thing', [Assignment('x', 1), Assignment('y', 1)]), False),
+    (Block('thing', [Assignment('x', 1)]), Block('vertex', [Assignment('x', 1)]), False),
+    (Block('thing', []), Assignment('thing', 1), False),
+    (TranslationUnit(Assignment('x', 1)), TranslationUnit(Assignment('x', 1), Assignment('y', 1)), False),
+])
+def test_eq_hash(a, b, equal):
+    assert (a == b) == equal
+    assert (b == a) == equal
+    if equal:
+        assert hash(a) == hash(b)
+    assert (a == b) == equal  # Again, now that the hashes are cached
+
+
+def test_with_value():
+    a = Assignment('x', 1)
+    hash(a)
+    b = a.with_value(2)
+    assert a == Assignment('x', 1)
+    assert b == Assignment('x', 2)
+    assert hash(b) == hash(Assignment('x', 2))
+
+
+def test_structural_sharing():
+    tu = parse_udmf('namespace = "zdoom"; thing { x = 1.0; y = 2.0; } vertex { x = 3.0; y = 4.0; }')
+    thing = tu[1].with_value('x', Decimal('5.0'))
+    returned = tu.replace_block(tu[1], thing)
+    expected = parse_udmf('namespace = "zdoom"; thing { x = 5.0; y = 2.0; } vertex { x = 3.0; y = 4.0; }')
+    assert str(returned) == str(expected)
+    assert str(tu[1]) == 'thing\n{\nx = 1.0;\ny = 2.0;\n}'
+    assert returned[0] is tu[0] and returned[2] is tu[2]
+    assert returned[1].expressions[1] is tu[1].expressions[1]
+    assert tu[1].with_value('angle', 90).expressions[2] == Assignment('angle', 90)
+    assert tu[1].with_assignment(Assignment('x', 5)).expressions == (Assignment('x', 5), tu[1].expressions[1])
+    assert tu.with_exprs({0: tu[2], 2: tu[0]})[::2] == (tu[2], tu[0])
+    assert deepcopy(tu) is tu
+    with pytest.raises(ValueError):
+        tu.replace_block(thing, tu[1])
+
+
+@pytest.mark.parametrize("node, name", [
+    (Assignment('x', 1), 'identifier'),
+    (Assignment('x', 1), '_value'),
+    (Block('thing', [Assignment('x', 1)]), '_expressions'),
+    (Block.packed('thing', ('x',), (1,)), '_values'),
+    (TranslationUnit(Assignment('x', 1)), 'global_expr_list'),
+    (TranslationUnit(Assignment('x', 1), spans=((0, 6),), source='x = 1;'), '_parsed'),
+])
+def test_immutable(node, name):
+    copied = deepcopy(node)
+    with pytest.raises(AttributeError):
+        setattr(node, name, 2)
+    with pytest.raises(AttributeError):
+        delattr(node, name)
+    assert copied is node
+    assert pickle.loads(pickle.dumps(node)) == node
+
+
+@pytest.mark.parametrize("textmap", [
+    '',
+    'namespace = "zdoom";',
+    'namespace = "zdoom"; thing { x = 1.0; } vertex { x = 2.0; y = 3.0; }',
+    'comment = "åäö";',
+])
+def test_write(textmap):
+    tu = parse_udmf(textmap)
+    assert "".join(tu.iter_text()) == str(tu)
+    buffer = io.BytesIO()
+    tu.write(buffer)
+    assert buffer.getvalue() == str(tu).encode('utf-8')
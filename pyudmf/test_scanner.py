@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+
+import io
+from decimal import Decimal
+
+import pytest
+
+from pyudmf.grammar.tu import Block, TranslationUnit
+from pyudmf.parser import parse_udmf, parse_udmf_iter, parse_udmf_buffer, parse_udmf_mmap, parse_udmf_parallel
+from pyudmf.scanner import _Scanner, _split, scan_udmf
+
+_textmap = """namespace = "zdoom";
+thing { x = 608.000; y = 256.000; type = 1; }
+vertex { x = 0.000; y = 0.000; }
+sidedef { sector = 0; texturemiddle = "MAR}BFACE"; }
+sector { heightceiling = 128; texturefloor = "CEIL3_3"; textureceiling = "CEIL3_3"; }
+"""
+
+
+@pytest.mark.parametrize("textmap", [
+    '',
+    '   \n\t ',
+    'namespace = "zdoom";',
+    'namespace="zdoom";thing{x=7.000;}',
+    'namespace = "zdoom"; thing {}',
+    'thing { type = 3001; angle = 90; ambush = true; }',
+    'linedef { v1 = 0; v2 = 1; sidefront = 0; sideback = 37; blocking = true; twosided = false; }',
+    'sidedef { sector = 2; texturetop = "ab"; offsetx = -256; offsety = +3; }',
+    'sector { texturefloor = "FLOOR6_2"; xscalefloor = 3.000000; yscalefloor = 7.; }',
+    'thing { x = "7.0"; }',
+    'a = b;',
+    'comment = "semicolon; and } brace";',
+    r'comment = "tab\there\nnewline";',
+    'comment = "";',
+    'namespace = "hexen"; thing { special = 3; arg0 = 1; dormant = false; arg0str = "7"; }',
+    'namespace = "doom"; sector { xpanningfloor = 1.5; } linedef { passuse = true; }',
+    'namespace = "custom"; customblock { x = 1.0; user_field = 3; }',
+    'linedef { dontdraw = 1; blocking = "true"; } sector { alpha = abc; heightfloor = "low"; }',
+    """
+thing
+{
+x = 608.000;
+y = 256.000;
+angle = 90;
+ambush = true;
+}
+
+sidedef
+{
+sector = 7;
+}
+    """,
+])
+def test_parity(textmap):
+    expected = parse_udmf(textmap, backend="pyparsing")
+    returned = parse_udmf(textmap, backend="scanner")
+    assert returned == expected
+    assert repr(returned) == repr(expected)
+    packed = parse_udmf(textmap, backend="scanner", packed=True)
+    assert packed == expected
+    assert str(packed) == str(expected)
+
+
+@pytest.mark.parametrize("textmap", [
+    'thing {',
+    'thing { x = ; }',
+    'a = 1; garbage',
+    'a = _x;',
+])
+def test_malformed(textmap):
+    with pytest.raises(ValueError):
+        parse_udmf(textmap, backend="scanner")
+
+
+@pytest.mark.parametrize("textmap", [
+    'comment = "line\nbreak";',
+    'thing { comment = "carriage\rreturn"; }',
+])
+def test_multiline_string(textmap):
+    # Quoted strings cannot span lines; the reference parser stops short of them, the scanner rejects them
+    assert parse_udmf(textmap, backend="pyparsing") == TranslationUnit()
+    with pytest.raises(ValueError):
+        parse_udmf(textmap, backend="scanner")
+    with pytest.raises(ValueError):
+        parse_udmf_buffer(textmap.encode())
+
+
+@pytest.mark.parametrize("backend", ["pyparsing", "scanner"])
+def test_mistyped_values_kept(backend):
+    tu = parse_udmf('linedef { dontdraw = 1; } sector { alpha = abc; heightfloor = 8; }', backend=backend)
+    assert [item for block in tu for item in block.items()] == [('dontdraw', '1'), ('alpha', 'abc'),
+                                                                 ('heightfloor', 8)]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        parse_udmf('', backend="lex")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 4096])
+def test_parse_udmf_iter(chunk_size):
+    returned = TranslationUnit(*parse_udmf_iter(io.StringIO(_textmap), chunk_size=chunk_size))
+    assert returned == parse_udmf(_textmap)
+
+
+def test_parse_udmf_iter_is_lazy():
+    f = io.StringIO(_textmap)
+    nodes = parse_udmf_iter(f, chunk_size=32)
+    assert next(nodes) == parse_udmf('namespace = "zdoom";')[0]
+    assert f.tell() < len(_textmap)
+
+
+def test_parse_udmf_iter_large_block(monkeypatch):
+    block = 'thing {{ {} }}'.format(' '.join('user_{} = {};'.format(i, i) for i in range(500)))
+    calls = []
+    global_expr = _Scanner.global_expr
+    monkeypatch.setattr(_Scanner, 'global_expr', lambda self, *args: calls.append(args) or global_expr(self, *args))
+
+    returned = list(parse_udmf_iter(io.StringIO(block + ' a = 1;'), chunk_size=16))
+
+    assert TranslationUnit(*returned) == parse_udmf(block + ' a = 1;', backend="scanner")
+    assert len(calls) < 20  # Not once per chunk, of which there are about 500
+
+
+def test_parse_udmf_iter_malformed():
+    with pytest.raises(ValueError):
+        list(parse_udmf_iter(io.StringIO('thing { x = 1;'), chunk_size=4))
+
+
+def test_parse_udmf_buffer():
+    returned = parse_udmf_buffer(_textmap.encode())
+    assert returned == parse_udmf(_textmap)
+
+
+def test_parse_udmf_buffer_defers_decoding():
+    tu = parse_udmf_buffer(b'thing { x = 608.000; } comment = "a\\tb";')
+    assert isinstance(tu[0].expressions[0]._token, memoryview)
+    assert tu[0].expressions[0].value == Decimal('608.000')
+    assert tu[1].value == 'a\tb'
+
+
+def test_parse_udmf_mmap(tmp_path):
+    path = tmp_path / "TEXTMAP.lmp"
+    path.write_text(_textmap)
+    assert parse_udmf_mmap(str(path)) == parse_udmf(_textmap)
+
+
+def test_parse_udmf_mmap_empty(tmp_path):
+    path = tmp_path / "TEXTMAP.lmp"
+    path.write_text('')
+    assert parse_udmf_mmap(str(path)) == TranslationUnit()
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 5, 100])
+def test_split(parts):
+    chunks = _split(_textmap, parts)
+    assert ''.join(chunks) == _textmap
+    assert len(chunks) <= parts
+    assert [e for c in chunks for e in parse_udmf(c, backend="scanner")] == list(parse_udmf(_textmap))
+
+
+def test_split_ignores_braces_in_strings():
+    textmap = 'a { b = "}}"; } c { d = "{}"; } e { }'
+    assert _split(textmap, 30) == ['a { b = "}}"; }', ' c { d = "{}"; }', ' e { }']
+
+
+def test_parse_udmf_parallel():
+    assert parse_udmf_parallel(_textmap * 10, workers=2) == parse_udmf(_textmap * 10)
+
+
+def test_parse_udmf_parallel_lazy():
+    returned = parse_udmf_parallel(_textmap * 10, workers=2, lazy=True)
+    assert all(a.token is not None for b in returned if isinstance(b, Block) for a in b.expressions)
+    assert returned == parse_udmf(_textmap * 10)
+    assert str(returned) == str(scan_udmf(_textmap * 10, lazy=True))
+
+
+def test_parse_udmf_parallel_error_offset():
+    textmap = 'thing { x = 1.0; }\n' * 100 + 'thing { x = ; }'
+    with pytest.raises(ValueError) as serial:
+        scan_udmf(textmap)
+    with pytest.raises(ValueError) as parallel:
+        parse_udmf_parallel(textmap, workers=2)
+    assert str(parallel.value) == str(serial.value) == "Unexpected input at offset {}".format(len(textmap) - 16)
+
+
+def test_lazy():
+    returned = parse_udmf(_textmap, backend="scanner", lazy=True)
+    assert all(a._token is not None for b in returned if isinstance(b, Block) for a in b.expressions)
+    assert returned == parse_udmf(_textmap)
+
+
+@pytest.mark.parametrize("textmap", [
+    'v1 = 007;',
+    'x = +1.50;',
+    'comment = "tab\\there";',
+    'thing\n{\nambush = true;\n}',
+])
+def test_lazy_verbatim(textmap):
+    assert str(parse_udmf(textmap, backend="scanner", lazy=True)) == textmap
+
+
+def test_lazy_reassigned():
+    tu = parse_udmf('x = 007;', backend="scanner", lazy=True)
+    assert tu[0].value == 7
+    assert str(tu) == 'x = 007;'
+    assert str(tu.with_expr(0, tu[0].with_value(8))) == 'x = 8;'
+    assert str(tu) == 'x = 007;'
+
+
+def test_lazy_pyparsing():
+    with pytest.raises(ValueError):
+        parse_udmf('', lazy=True)
+
+
+def _edit(text, start, end, replacement):
+    return text[:start] + replacement + text[end:], (start, end, len(replacement))
+
+
+@pytest.mark.parametrize("old, new", [
+    ('x = 608.000;', 'x = 1.500;'),
+    ('texturemiddle = "MAR}BFACE";', 'texturemiddle = "STONE2"; offsetx = 3;'),
+    ('vertex', 'thing'),
+    ('sector {', 'vertex { x = 1; y = 2; }\nsector {'),
+    ('\nvertex', ' \nvertex'),
+    ('vertex { x = 0.000; y = 0.000; }', ''),
+    ('"zdoom";', '"zdoom"; a = b;'),
+    ('"CEIL3_3"; }\n', '"CEIL3_3"; }\nthing { }'),
+    ('sidedef { sector = 0; texturemiddle = "MAR}BFACE"; }', 'sidedef { sector = 0; '),  # Breaks a block apart
+])
+def test_update(old, new):
+    tu = parse_udmf(_textmap, backend="scanner")
+    start = _textmap.index(old)
+    text, edit = _edit(_textmap, start, start + len(old), new)
+    try:
+        expected = parse_udmf(text, backend="scanner")
+    except ValueError:
+        with pytest.raises(ValueError):
+            tu.update(text, [edit])
+        return
+    returned = tu.update(text, [edit])
+    assert returned == expected
+    assert returned.spans == expected.spans
+
+
+def test_update_shares_untouched_nodes():
+    tu = parse_udmf(_textmap, backend="scanner")
+    start = _textmap.index('608')
+    text, edit1 = _edit(_textmap, start, start + 3, '1')
+    start = _textmap.index('128')
+    text, edit2 = _edit(text, start - 2, start + 1, '256')
+    edit2 = (edit2[0] + 2, edit2[1] + 2, edit2[2])  # In the coordinates of the original text
+    returned = tu.update(text, [edit2, edit1])
+    assert returned == parse_udmf(text, backend="scanner")
+    assert [a is b for a, b in zip(tu, returned)] == [True, False, True, True, False]
+
+
+def test_update_without_spans():
+    tu = parse_udmf(_textmap)
+    assert tu.spans is None
+    assert tu.update(_textmap + 'a = b;', [(len(_textmap), len(_textmap), 6)]) == parse_udmf(_textmap + 'a = b;')
+
+
+def test_packed_items():
+    block = parse_udmf(_textmap, backend="scanner", packed=True)[1]
+    assert block._expressions is None
+    assert list(block.items()) == [(e.identifier, e.value) for e in parse_udmf(_textmap)[1].expressions]
+    assert block._expressions is None
+
+
+def test_packed_lazy():
+    with pytest.raises(ValueError):
+        parse_udmf(_textmap, backend="scanner", lazy=True, packed=True)
+    with pytest.raises(ValueError):
+        parse_udmf(_textmap, packed=True)
+
+
+def test_identifiers_interned():
+    first, second = (parse_udmf(_textmap, backend="scanner") for _ in range(2))
+    assert first[1].identifier is second[1].identifier
+    assert first[1].expressions[0].identifier is second[1].expressions[0].identifier
+
+
+@pytest.mark.parametrize("textmap", [
+    '',
+    '  \n',
+    _textmap,
+    'namespace="zdoom";thing{x=7.000;}\n\n\n',
+    r'comment = "tab\there";  a = b;',
+])
+def test_preserve_source(textmap):
+    tu = parse_udmf(textmap, backend="scanner", preserve_source=True)
+    assert str(tu) == textmap
+    assert tu == parse_udmf(textmap)
+    buffer = io.BytesIO()
+    parse_udmf_buffer(textmap.encode(), preserve_source=True).write(buffer)
+    assert buffer.getvalue() == textmap.encode()
+
+
+def test_preserve_source_modified():
+    tu = parse_udmf(_textmap, backend="scanner", preserve_source=True)
+    assert not tu.modified()
+    returned = tu.with_expr(2, tu[2].with_value('x', Decimal('1.000')))
+    assert returned.modified()
+    expected = _textmap.replace('\nvertex { x = 0.000; y = 0.000; }', '\n\nvertex\n{\nx = 1.000;\ny = 0.000;\n}')
+    assert str(returned) == expected
+    assert str(tu) == _textmap
+
+
+def test_preserve_source_update():
+    tu = parse_udmf(_textmap, backend="scanner", preserve_source=True)
+    start = _textmap.index('608')
+    text, edit = _edit(_textmap, start, start + 3, '1')
+    returned = tu.update(text, [edit])
+    assert str(returned) == text
+    returned = tu.with_expr(0, tu[0]).with_expr(2, tu[3]).update(text, [edit])
+    assert returned == parse_udmf(text) and str(returned) == text
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import io
+
+import pytest
+
+from pyudmf.parser import parse_udmf
+from pyudmf.wad import Lump, Wad, is_wad, write_wad
+
+_textmap = b'namespace = "zdoom";\nvertex { x = 0.000; y = 0.000; }\n'
+
+
+@pytest.fixture
+def lumps():
+    return [
+        Lump('MAP01', b''),
+        Lump('TEXTMAP', _textmap),
+        Lump('ZNODES', b'\x01\x02\x03'),
+        Lump('ENDMAP', b''),
+        Lump('MAP02', b''),
+        Lump('TEXTMAP', b'namespace = "doom";'),
+        Lump('ENDMAP', b''),
+        Lump('COLORMAP', b'\xff' * 17),
+    ]
+
+
+@pytest.fixture
+def path(tmp_path, lumps):
+    path = tmp_path / "maps.wad"
+    with open(str(path), 'wb') as f:
+        write_wad(f, lumps)
+    return str(path)
+
+
+def test_read(path, lumps):
+    wad = Wad(path)
+    assert is_wad(path)
+    assert wad.magic == b'PWAD'
+    assert [(lump.name, bytes(lump.data)) for lump in wad.lumps] == lumps
+
+
+def test_textmaps(path):
+    textmaps = Wad(path).textmaps()
+    assert list(textmaps) == ['MAP01', 'MAP02']
+    assert isinstance(textmaps['MAP01'], memoryview)
+    assert textmaps['MAP01'] == _textmap
+
+
+def test_parse(path):
+    assert Wad(path).parse()['MAP01'] == parse_udmf(_textmap.decode())
+
+
+def test_rewrite(path, lumps):
+    wad = Wad(path)
+    rewritten = wad.with_textmaps(lambda name, data: b'namespace = "zdoom";' if name == 'MAP02' else None)
+    assert rewritten[1].data is wad.lumps[1].data
+    f = io.BytesIO()
+    write_wad(f, rewritten, wad.magic)
+    lumps[5] = Lump('TEXTMAP', b'namespace = "zdoom";')
+    expected = io.BytesIO()
+    write_wad(expected, lumps)
+    assert f.getvalue() == expected.getvalue()
+
+
+def test_rewrite_drops_stale_nodes(path):
+    wad = Wad(path)
+    rewritten = wad.with_textmaps(lambda name, data: b'namespace = "zdoom";' if name == 'MAP01' else None)
+    assert [lump.name for lump in rewritten] == ['MAP01', 'TEXTMAP', 'ENDMAP', 'MAP02', 'TEXTMAP', 'ENDMAP',
+                                                 'COLORMAP']
+    kept = wad.with_textmaps(lambda name, data: None)
+    assert [lump.name for lump in kept] == [lump.name for lump in wad.lumps]
+    unfiltered = wad.with_textmaps(lambda name, data: b'', stale=frozenset())
+    assert [lump.name for lump in unfiltered] == [lump.name for lump in wad.lumps]
+
+
+def test_duplicate_map_names(tmp_path, lumps):
+    path = tmp_path / "maps.wad"
+    with open(str(path), 'wb') as f:
+        write_wad(f, lumps + lumps[:4])
+    with pytest.raises(ValueError):
+        Wad(str(path)).textmaps()
+
+
+@pytest.mark.parametrize("data", [b'', b'PWAD', b'PWAD\x01\x00\x00\x00', b'PWAD\x01\x00\x00\x00\x0c\x00\x00\x00'])
+def test_truncated(tmp_path, data):
+    path = tmp_path / "maps.wad"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        Wad(str(path))
+
+
+def test_not_a_wad(tmp_path):
+    path = tmp_path / "TEXTMAP.lmp"
+    path.write_bytes(_textmap)
+    assert not is_wad(str(path))
+    with pytest.raises(ValueError):
+        Wad(str(path))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+Reading and writing WAD archives holding UDMF maps, i.e. sequences of a map marker lump, a TEXTMAP lump, optional
+further lumps, and an ENDMAP lump.
+"""
+
+import mmap
+import struct
+from collections import namedtuple
+from typing import AbstractSet, BinaryIO, Callable, Dict, Iterable, List, Optional
+
+from pyudmf.grammar.tu import TranslationUnit
+from pyudmf.scanner import parse_udmf_buffer
+
+MAGICS = (b'IWAD', b'PWAD')
+
+_HEADER = struct.Struct('<4sii')  # magic, number of lumps, offset of the directory
+_ENTRY = struct.Struct('<ii8s')  # offset of the data, size of the data, name
+
+Lump = namedtuple('Lump', ['name', 'data'])
+
+# Lumps a node builder derives from the geometry of a map, which a changed TEXTMAP makes stale
+NODE_LUMPS = frozenset(['ZNODES', 'BLOCKMAP', 'REJECT'])
+
+
+def _decode_name(name: bytes) -> str:
+    return name.split(b'\0', 1)[0].decode('ascii')
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode('ascii')
+    if len(encoded) > 8:
+        raise ValueError("Lump name longer than 8 characters: {}".format(name))
+    return encoded
+
+
+def is_wad(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(4) in MAGICS
+
+
+class Wad(object):
+    """
+    A memory-mapped WAD archive. The data of every lump is a memoryview into the mapping, which stays open for as
+    long as any such view is referenced.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files cannot be mapped
+                raise ValueError("Not a WAD file: {}".format(path))
+        view = memoryview(buffer)
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Not a WAD file: {}".format(path))
+        self.magic, count, directory = _HEADER.unpack_from(buffer, 0)
+        if self.magic not in MAGICS:
+            raise ValueError("Not a WAD file: {}".format(path))
+        if count < 0 or directory < 0 or directory + count * _ENTRY.size > len(buffer):
+            raise ValueError("Truncated WAD directory: {}".format(path))
+        entries = (_ENTRY.unpack_from(buffer, directory + i * _ENTRY.size) for i in range(count))
+        self.lumps = tuple(Lump(_decode_name(name), view[offset:offset + size]) for offset, size, name in entries)
+
+    def textmaps(self) -> Dict[str, memoryview]:
+        """
+        :return: The TEXTMAP lump of every UDMF map in the archive, keyed by map name, in archive order.
+        :raise ValueError: If two maps have the same name.
+        """
+        textmaps = {}
+        for i, lump in enumerate(self.lumps):
+            if lump.name == 'TEXTMAP' and i > 0:
+                name = self.lumps[i - 1].name
+                if name in textmaps:
+                    raise ValueError("Duplicate map name: {}".format(name))
+                textmaps[name] = lump.data
+        return textmaps
+
+    def parse(self) -> Dict[str, TranslationUnit]:
+        """ :return: The parsed TEXTMAP of every UDMF map in the archive, keyed by map name. """
+        return {name: parse_udmf_buffer(data) for name, data in self.textmaps().items()}
+
+    def with_textmaps(self, transform: Callable[[str, memoryview], Optional[bytes]],
+                      stale: AbstractSet[str] = NODE_LUMPS) -> List[Lump]:
+        """
+        :param transform: Called with the name and TEXTMAP of every map; returns the new TEXTMAP, or None to keep it.
+        :param stale: Names of the lumps between a replaced TEXTMAP and its ENDMAP to leave out, as they describe the
+                      old map. By default, those of a node builder, which ports rebuild when they are missing.
+        :return: The lumps of the archive with the TEXTMAPs replaced. All other lumps still refer to the mapping.
+        """
+        lumps = []
+        replaced = False
+        for i, lump in enumerate(self.lumps):
+            if lump.name == 'TEXTMAP' and i > 0:
+                data = transform(self.lumps[i - 1].name, lump.data)
+                replaced = data is not None
+                if replaced:
+                    lump = Lump(lump.name, data)
+            elif lump.name == 'ENDMAP':
+                replaced = False
+            elif replaced and lump.name in stale:
+                continue
+            lumps.append(lump)
+        return lumps
+
+
+def write_wad(fileobj: BinaryIO, lumps: Iterable[Lump], magic: bytes = b'PWAD'):
+    """
+    Writes a WAD archive to @fileobj in a single sequential pass: header, lump data, directory. Lump data is written
+    straight from whatever buffer it is held in, so @fileobj need not be seekable.
+    """
+    lumps = list(lumps)
+    directory = []
+    offset = _HEADER.size
+    for lump in lumps:
+        size = memoryview(lump.data).nbytes
+        directory.append(_ENTRY.pack(offset, size, _encode_name(lump.name)))
+        offset += size
+    fileobj.write(_HEADER.pack(magic, len(lumps), offset))
+    for lump in lumps:
+        fileobj.write(lump.data)
+    fileobj.write(b''.join(directory))